@@ -0,0 +1,461 @@
+"""Append-only audit log of tool invocations.
+
+Tool calls only append a record to a bounded in-memory queue. A background
+writer thread drains the queue in batches, writes them as JSON lines and calls
+``fsync`` once per batch group, when enough bytes or time have accumulated.
+This keeps disk I/O off the request path. When the queue is full, records are
+dropped and counted (``drop``) or the caller waits for space (``block``).
+Async handlers wait in the shared executor pool rather than on the event loop.
+If the writer fails, the log disables itself instead of leaving callers
+waiting on a thread that is gone.
+
+Files are rotated by size: ``audit.jsonl`` is renamed to ``audit.jsonl.1``
+and so on, up to the configured number of backups.
+"""
+
+import functools
+import inspect
+import logging
+import os
+import queue
+import threading
+import time
+from collections.abc import Callable, Iterator
+from pathlib import Path
+from typing import Any, BinaryIO, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+from mcp_server.concurrency import run_sync
+from mcp_server.server import ServerConfig
+from mcp_server.sessions import current_session_id
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+OVERFLOW_POLICIES = ("drop", "block")
+
+# How long query() waits for queued records to be written before reading
+QUERY_FLUSH_TIMEOUT = 5.0
+
+# How often waits on the writer check that it is still running
+_POLL_INTERVAL = 0.1
+
+# Size of the blocks read when scanning a file backwards
+_READ_BLOCK = 64 * 1024
+
+
+class AuditRecord(BaseModel):
+    """A single tool invocation."""
+
+    ts: float
+    tool: str
+    session: str | None = None
+    args: dict[str, Any]
+    result: Any = None
+    error: str | None = None
+    latency_ms: float
+
+
+class _FlushMarker:
+    """Queue item asking the writer to sync and report back."""
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+
+
+_STOP = object()
+
+
+class AuditLog:
+    """Buffered audit log with a background writer thread."""
+
+    def __init__(self, config: ServerConfig | None = None) -> None:
+        self._lock = threading.Lock()
+        self._queue: queue.Queue[Any] = queue.Queue()
+        self._writer: threading.Thread | None = None
+        self._failed = False
+        self._dropped = 0
+        self._written = 0
+        self._syncs = 0
+        self.configure(config or ServerConfig())
+
+    @property
+    def enabled(self) -> bool:
+        """Whether records are being persisted."""
+        return self._writer is not None and not self._failed
+
+    def configure(self, config: ServerConfig) -> None:
+        """Apply a configuration, restarting the writer if a path is set."""
+        if config.audit_overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(
+                f"Unknown audit overflow policy '{config.audit_overflow_policy}'"
+            )
+        self.close()
+        with self._lock:
+            self.path = Path(config.audit_log_path) if config.audit_log_path else None
+            self.overflow = config.audit_overflow_policy
+            self.flush_interval = config.audit_flush_interval
+            self.flush_bytes = config.audit_flush_bytes
+            self.max_bytes = config.audit_max_bytes
+            self.backup_count = config.audit_backup_count
+            self._queue = queue.Queue(maxsize=config.audit_queue_size)
+            self._failed = False
+            if self.path is None:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._writer = threading.Thread(
+                target=self._run, name="mcp-audit-writer", daemon=True
+            )
+            self._writer.start()
+
+    def record(self, entry: AuditRecord) -> bool:
+        """
+        Queue a record for writing.
+
+        Args:
+            entry: The record to append
+
+        Returns:
+            True if the record was queued, False if it was dropped or the
+            log is disabled
+        """
+        if not self.enabled:
+            return False
+        if self.overflow == "block":
+            queued = self._put(entry)
+        else:
+            try:
+                self._queue.put_nowait(entry)
+                queued = True
+            except queue.Full:
+                queued = False
+        if not queued:
+            with self._lock:
+                self._dropped += 1
+        return queued
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """
+        Wait until everything queued so far is written and synced.
+
+        Returns:
+            True if the flush completed within ``timeout``; False if it timed
+            out or the writer has failed
+        """
+        if self._writer is None:
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        marker = _FlushMarker()
+        if not self._put(marker, deadline):
+            return False
+        while not marker.done.wait(_POLL_INTERVAL):
+            if self._failed:
+                return False
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+        return True
+
+    def close(self) -> None:
+        """Write out pending records and stop the writer thread."""
+        writer = self._writer
+        if writer is None:
+            return
+        self._put(_STOP)
+        writer.join()
+        self._writer = None
+
+    def stats(self) -> dict[str, Any]:
+        """Return counters describing the log's state."""
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "failed": self._failed,
+                "pending": self._queue.qsize(),
+                "written": self._written,
+                "dropped": self._dropped,
+                "syncs": self._syncs,
+            }
+
+    def query(
+        self,
+        since: float | None = None,
+        until: float | None = None,
+        tool: str | None = None,
+        limit: int = 100,
+    ) -> list[AuditRecord]:
+        """
+        Return the most recent records within a time range, oldest first.
+
+        Records still in the queue are flushed first so that they are
+        included, waiting at most :data:`QUERY_FLUSH_TIMEOUT` seconds. Files
+        are scanned newest first and scanning stops as soon as ``limit``
+        records are found.
+
+        Args:
+            since: Only include records at or after this Unix timestamp
+            until: Only include records at or before this Unix timestamp
+            tool: Only include records for this tool
+            limit: Maximum number of records to return
+
+        Returns:
+            Up to ``limit`` matching records
+        """
+        if self.path is None or limit <= 0:
+            return []
+        if not self.flush(QUERY_FLUSH_TIMEOUT):
+            logger.warning("Audit log not flushed; recent records may be missing")
+        matches: list[AuditRecord] = []
+        for path in self._files_newest_first():
+            try:
+                if since is not None and path.stat().st_mtime < since:
+                    # Nothing in this or any older file was written after
+                    # ``since``
+                    break
+                for line in _lines_reversed(path):
+                    if not line.strip():
+                        continue
+                    try:
+                        entry = AuditRecord.model_validate_json(line)
+                    except ValidationError:
+                        # A line cut short by a crash, or still being written
+                        logger.debug("Skipping unreadable line in %s", path)
+                        continue
+                    if since is not None and entry.ts < since:
+                        continue
+                    if until is not None and entry.ts > until:
+                        continue
+                    if tool is not None and entry.tool != tool:
+                        continue
+                    matches.append(entry)
+                    if len(matches) == limit:
+                        return matches[::-1]
+            except FileNotFoundError:
+                continue
+            except OSError as e:
+                logger.warning("Cannot read audit file %s: %s", path, e)
+        return matches[::-1]
+
+    def _files_newest_first(self) -> Iterator[Path]:
+        assert self.path is not None
+        yield self.path
+        for index in range(1, self.backup_count + 1):
+            yield self.path.with_name(f"{self.path.name}.{index}")
+
+    def _put(self, item: Any, deadline: float | None = None) -> bool:
+        """
+        Wait for space in the queue while the writer is running.
+
+        Returns:
+            True if the item was queued; False if the writer failed or
+            ``deadline`` passed first
+        """
+        while not self._failed:
+            try:
+                self._queue.put(item, timeout=_POLL_INTERVAL)
+                return True
+            except queue.Full:
+                if deadline is not None and time.monotonic() >= deadline:
+                    return False
+        return False
+
+    def _run(self) -> None:
+        assert self.path is not None
+        stream = None
+        unsynced = 0
+        last_sync = time.monotonic()
+        try:
+            stream = _open_for_append(self.path)
+            while True:
+                timeout = max(0.0, last_sync + self.flush_interval - time.monotonic())
+                batch = self._next_batch(timeout if unsynced else None)
+                markers = [item for item in batch if isinstance(item, _FlushMarker)]
+                stop = any(item is _STOP for item in batch)
+                records = [item for item in batch if isinstance(item, AuditRecord)]
+
+                if records:
+                    data = b"".join(
+                        entry.model_dump_json(exclude_none=True).encode() + b"\n"
+                        for entry in records
+                    )
+                    stream.write(data)
+                    unsynced += len(data)
+                    with self._lock:
+                        self._written += len(records)
+
+                due = time.monotonic() - last_sync >= self.flush_interval
+                if unsynced and (
+                    markers or stop or due or unsynced >= self.flush_bytes
+                ):
+                    self._sync(stream)
+                    unsynced = 0
+                    last_sync = time.monotonic()
+                    if stream.tell() >= self.max_bytes:
+                        stream.close()
+                        self._rotate()
+                        stream = _open_for_append(self.path)
+
+                for marker in markers:
+                    marker.done.set()
+                if stop:
+                    return
+        except Exception:
+            logger.exception("Audit log writer failed; audit records are lost")
+            self._failed = True
+            self._release_waiters()
+        finally:
+            if stream is not None:
+                stream.close()
+
+    def _release_waiters(self) -> None:
+        """Discard what is queued after a failure, waking any flush callers."""
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if isinstance(item, _FlushMarker):
+                item.done.set()
+
+    def _next_batch(self, timeout: float | None) -> list[Any]:
+        """Block for one item (up to ``timeout``), then drain what is queued."""
+        try:
+            batch = [self._queue.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                return batch
+
+    def _sync(self, stream: Any) -> None:
+        stream.flush()
+        os.fsync(stream.fileno())
+        with self._lock:
+            self._syncs += 1
+
+    def _rotate(self) -> None:
+        assert self.path is not None
+        if self.backup_count <= 0:
+            self.path.unlink(missing_ok=True)
+            return
+        for index in range(self.backup_count - 1, 0, -1):
+            source = self.path.with_name(f"{self.path.name}.{index}")
+            if source.exists():
+                source.replace(self.path.with_name(f"{self.path.name}.{index + 1}"))
+        self.path.replace(self.path.with_name(f"{self.path.name}.1"))
+
+
+def _open_for_append(path: Path) -> BinaryIO:
+    """
+    Open a log file for appending, on a fresh line.
+
+    A crash mid-write can leave a partial last line; without the newline the
+    next record would be glued onto it and stay unreadable.
+    """
+    stream = path.open("ab")
+    if stream.tell() > 0:
+        with path.open("rb") as existing:
+            existing.seek(-1, os.SEEK_END)
+            if existing.read(1) != b"\n":
+                stream.write(b"\n")
+    return stream
+
+
+def _lines_reversed(path: Path) -> Iterator[str]:
+    """Yield the lines of a file from last to first, reading from the end."""
+    with path.open("rb") as stream:
+        position = stream.seek(0, os.SEEK_END)
+        tail = b""
+        while position > 0:
+            size = min(_READ_BLOCK, position)
+            position -= size
+            stream.seek(position)
+            lines = (stream.read(size) + tail).split(b"\n")
+            # The first piece may be the end of a line that starts in the
+            # previous block
+            tail = lines.pop(0)
+            for line in reversed(lines):
+                yield line.decode("utf-8")
+        yield tail.decode("utf-8")
+
+
+# Process-wide audit log used by the registered tools
+audit_log = AuditLog()
+
+
+def audited(fn: F) -> F:
+    """
+    Record every call to a tool handler in :data:`audit_log`.
+
+    Works for both sync and async handlers and keeps the handler's signature
+    so FastMCP derives the same schema. Exceptions are recorded and re-raised.
+
+    Args:
+        fn: The tool handler to audit
+
+    Returns:
+        The wrapped handler
+    """
+    signature = inspect.signature(fn)
+    name = fn.__name__
+
+    def emit(
+        started: float,
+        start_counter: float,
+        args: tuple[Any, ...],
+        kwargs: dict[str, Any],
+        result: Any,
+        error: BaseException | None,
+    ) -> None:
+        if not audit_log.enabled:
+            return
+        bound = signature.bind_partial(*args, **kwargs)
+        audit_log.record(
+            AuditRecord(
+                ts=started,
+                tool=name,
+                session=current_session_id(),
+                args=dict(bound.arguments),
+                result=result,
+                error=None if error is None else str(error),
+                latency_ms=(time.perf_counter() - start_counter) * 1000,
+            )
+        )
+
+    async def async_emit(*emit_args: Any) -> None:
+        # A blocking put must not stall every session on the event loop
+        if audit_log.enabled and audit_log.overflow == "block":
+            await run_sync(emit, *emit_args)
+        else:
+            emit(*emit_args)
+
+    if inspect.iscoroutinefunction(fn):
+
+        @functools.wraps(fn)
+        async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+            started, start_counter = time.time(), time.perf_counter()
+            try:
+                result = await fn(*args, **kwargs)
+            except Exception as e:
+                await async_emit(started, start_counter, args, kwargs, None, e)
+                raise
+            await async_emit(started, start_counter, args, kwargs, result, None)
+            return result
+
+        return async_wrapper  # type: ignore[return-value]
+
+    @functools.wraps(fn)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        started, start_counter = time.time(), time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            emit(started, start_counter, args, kwargs, None, e)
+            raise
+        emit(started, start_counter, args, kwargs, result, None)
+        return result
+
+    return wrapper  # type: ignore[return-value]
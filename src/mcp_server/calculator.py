@@ -0,0 +1,378 @@
+"""Bounded arithmetic evaluator used by the calculate tool.
+
+Expressions are parsed with :mod:`ast` and evaluated node by node instead of
+being handed to ``eval``. Everything that could make the cost of an input
+grow without bound is checked before the work is done: the length of the
+expression, the nesting depth of its syntax tree and the size of every
+integer produced along the way. An input such as ``9**9**9`` is therefore
+rejected in microseconds instead of occupying a worker thread indefinitely.
+
+:func:`execute` additionally accepts variable names and a single
+``name = expression`` assignment, for callers that keep variables between
+calculations (see :mod:`mcp_server.sessions`).
+
+Short inputs are cached: validated statements in a compact compiled form, and
+results of expressions that use no variables. :func:`warm` fills the caches
+ahead of traffic, e.g. from a capture file (see :mod:`mcp_server.traffic`).
+"""
+
+import ast
+import functools
+import math
+import operator
+import string
+from collections.abc import Callable, Mapping
+from typing import Any
+
+# Characters an expression may contain
+ALLOWED_CHARS = frozenset("0123456789+-*/.() ")
+
+# Characters a statement may contain when variables are available
+VARIABLE_CHARS = ALLOWED_CHARS | frozenset(string.ascii_letters + "_=")
+
+# Longest expression accepted, in characters
+MAX_EXPRESSION_LENGTH = 4096
+
+# Deepest nesting accepted, counting unary operators and right operands;
+# left-associative chains such as 1 + 2 + 3 do not add to it
+MAX_DEPTH = 100
+
+# Largest integer result accepted, in bits (about 3000 decimal digits)
+MAX_INT_BITS = 10_000
+
+# Longest variable name accepted, in characters
+MAX_NAME_LENGTH = 64
+
+# Longest input whose compiled form and result are cached, in characters
+MAX_CACHED_LENGTH = 256
+
+# Entries kept in each of the statement and result caches
+CACHE_SIZE = 1024
+
+Number = int | float | complex
+Variables = Mapping[str, Number]
+
+_NO_VARIABLES: Variables = {}
+
+_BINARY_OPS: dict[type[ast.operator], Callable[[Number, Number], Number]] = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Pow: operator.pow,
+}
+
+_UNARY_OPS: dict[type[ast.unaryop], Callable[[Number], Number]] = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+
+
+class CalculationError(ValueError):
+    """Raised when an expression is rejected before or during evaluation."""
+
+
+def parse(expression: str) -> ast.Expression:
+    """
+    Parse an expression and check that it is safe and cheap to evaluate.
+
+    Args:
+        expression: The arithmetic expression to parse
+
+    Returns:
+        The validated syntax tree
+
+    Raises:
+        CalculationError: If the expression is too long, too deeply nested or
+            uses anything other than numbers and arithmetic operators
+        SyntaxError: If the expression is not valid syntax
+    """
+    tree = _parse(expression, "eval")
+    assert isinstance(tree, ast.Expression)
+    _check_tree(tree, names=False)
+    return tree
+
+
+def parse_statement(statement: str) -> tuple[str | None, ast.Expression]:
+    """
+    Parse an expression or a ``name = expression`` assignment.
+
+    Unlike :func:`parse`, the expression may refer to variables by name.
+
+    Args:
+        statement: The statement to parse (e.g., "x = 3 * 7" or "x / 2")
+
+    Returns:
+        The assigned name, or None for a bare expression, and the validated
+        syntax tree of the expression
+
+    Raises:
+        CalculationError: If the statement is not a single expression or
+            assignment, or the expression fails the checks of :func:`parse`
+        SyntaxError: If the statement is not valid syntax
+    """
+    module = _parse(statement, "exec")
+    assert isinstance(module, ast.Module)
+    if len(module.body) != 1:
+        raise CalculationError("Expected a single expression or assignment")
+    node = module.body[0]
+    target: str | None = None
+    if (
+        isinstance(node, ast.Assign)
+        and len(node.targets) == 1
+        and isinstance(node.targets[0], ast.Name)
+    ):
+        target = node.targets[0].id
+        if len(target) > MAX_NAME_LENGTH:
+            raise CalculationError(
+                f"Variable name is too long (limit {MAX_NAME_LENGTH} characters)"
+            )
+        value = node.value
+    elif isinstance(node, ast.Expr):
+        value = node.value
+    else:
+        raise CalculationError("Only expressions and 'name = expression' are allowed")
+    tree = ast.Expression(body=value)
+    _check_tree(tree, names=True)
+    return target, tree
+
+
+def evaluate(expression: str) -> Number:
+    """
+    Evaluate an arithmetic expression within fixed time and memory bounds.
+
+    Args:
+        expression: The arithmetic expression to evaluate (e.g., "2 ** 10")
+
+    Returns:
+        The numeric result, with the same semantics as Python arithmetic
+
+    Raises:
+        CalculationError: If the expression or an intermediate result
+            exceeds the limits of this module
+        SyntaxError: If the expression is not valid syntax
+        ArithmeticError: For errors such as division by zero or float overflow
+    """
+    if len(expression) <= MAX_CACHED_LENGTH:
+        return _result_cache(expression)
+    return _evaluate_expression(expression)
+
+
+def execute(statement: str, variables: Variables) -> tuple[str | None, Number]:
+    """
+    Evaluate an expression or assignment using the given variables.
+
+    The caller is responsible for storing an assigned value; ``variables`` is
+    only read.
+
+    Args:
+        statement: An expression or ``name = expression`` assignment
+        variables: Values of the names the expression may refer to
+
+    Returns:
+        The assigned name, or None for a bare expression, and the value
+
+    Raises:
+        CalculationError: As for :func:`evaluate`, or if a name is unknown
+        SyntaxError: If the statement is not valid syntax
+        ArithmeticError: For errors such as division by zero or float overflow
+    """
+    if ALLOWED_CHARS.issuperset(statement):
+        return None, evaluate(statement)
+    if len(statement) <= MAX_CACHED_LENGTH:
+        target, code = _statement_cache(statement)
+    else:
+        target, code = _compile_statement(statement)
+    return target, _evaluate(code, variables)
+
+
+def warm(statement: str) -> bool:
+    """
+    Fill the caches for a statement as calculating it would.
+
+    Args:
+        statement: An expression or assignment, e.g. from captured traffic
+
+    Returns:
+        Whether the statement is now cached; False if it is too long or
+        invalid
+    """
+    if len(statement) > MAX_CACHED_LENGTH:
+        return False
+    try:
+        if ALLOWED_CHARS.issuperset(statement):
+            _result_cache(statement)
+        else:
+            _statement_cache(statement)
+    except Exception:
+        return False
+    return True
+
+
+def configure_caches(size: int) -> None:
+    """
+    Replace the statement and result caches with empty ones.
+
+    Args:
+        size: Entries to keep in each cache; 0 disables caching
+    """
+    global _statement_cache, _result_cache
+    _statement_cache = functools.lru_cache(maxsize=size)(_compile_statement)
+    _result_cache = functools.lru_cache(maxsize=size)(_evaluate_expression)
+
+
+def cache_stats() -> dict[str, dict[str, Any]]:
+    """Return hit, miss and size counters of the statement and result caches."""
+    return {
+        "statements": _statement_cache.cache_info()._asdict(),
+        "results": _result_cache.cache_info()._asdict(),
+    }
+
+
+def _evaluate_expression(expression: str) -> Number:
+    return _evaluate(_compile(parse(expression).body), _NO_VARIABLES)
+
+
+def _compile_statement(statement: str) -> tuple[str | None, Any]:
+    target, tree = parse_statement(statement)
+    return target, _compile(tree.body)
+
+
+_statement_cache = functools.lru_cache(maxsize=CACHE_SIZE)(_compile_statement)
+_result_cache = functools.lru_cache(maxsize=CACHE_SIZE)(_evaluate_expression)
+
+
+def _parse(source: str, mode: str) -> ast.AST:
+    if len(source) > MAX_EXPRESSION_LENGTH:
+        raise CalculationError(
+            f"Expression is too long ({len(source)} characters, "
+            f"limit {MAX_EXPRESSION_LENGTH})"
+        )
+    try:
+        return ast.parse(source, mode=mode)
+    except (RecursionError, MemoryError) as e:
+        raise CalculationError("Expression is too deeply nested") from e
+
+
+def _check_tree(tree: ast.Expression, *, names: bool) -> None:
+    stack: list[tuple[ast.AST, int]] = [(tree.body, 1)]
+    while stack:
+        node, depth = stack.pop()
+        if depth > MAX_DEPTH:
+            raise CalculationError(
+                f"Expression is too deeply nested (limit {MAX_DEPTH} levels)"
+            )
+        if isinstance(node, ast.BinOp):
+            if type(node.op) not in _BINARY_OPS:
+                raise CalculationError("Unsupported operator")
+            stack.append((node.left, depth))
+            stack.append((node.right, depth + 1))
+        elif isinstance(node, ast.UnaryOp):
+            if type(node.op) not in _UNARY_OPS:
+                raise CalculationError("Unsupported operator")
+            stack.append((node.operand, depth + 1))
+        elif isinstance(node, ast.Constant):
+            value = node.value
+            if isinstance(value, bool) or not isinstance(value, int | float):
+                raise CalculationError("Only numbers are allowed")
+            _check_int(value)
+        elif names and isinstance(node, ast.Name):
+            continue
+        else:
+            raise CalculationError(f"Unsupported syntax: {type(node).__name__}")
+
+
+def _compile(node: ast.expr) -> Any:
+    """
+    Convert a checked tree to nested tuples, a tenth of the size of the AST.
+
+    Numbers stay as they are, names become strings, unary operations become
+    ``(op, operand)`` and binary operations ``(op, left, right)``, where
+    ``op`` is the :mod:`ast` operator class. The tree is walked with an
+    explicit stack, so long operator chains do not recurse.
+    """
+    compiled: list[Any] = []
+    stack: list[tuple[ast.expr, bool]] = [(node, False)]
+    while stack:
+        current, operands_done = stack.pop()
+        if isinstance(current, ast.Constant):
+            compiled.append(current.value)
+        elif isinstance(current, ast.Name):
+            compiled.append(current.id)
+        elif isinstance(current, ast.UnaryOp):
+            if operands_done:
+                compiled.append((type(current.op), compiled.pop()))
+            else:
+                stack.append((current, True))
+                stack.append((current.operand, False))
+        elif isinstance(current, ast.BinOp):
+            if operands_done:
+                right = compiled.pop()
+                compiled.append((type(current.op), compiled.pop(), right))
+            else:
+                stack.append((current, True))
+                stack.append((current.right, False))
+                stack.append((current.left, False))
+        else:
+            raise CalculationError(f"Unsupported syntax: {type(current).__name__}")
+    return compiled.pop()
+
+
+def _evaluate(code: Any, variables: Variables) -> Number:
+    """Evaluate compiled code with an explicit stack rather than recursion."""
+    values: list[Number] = []
+    stack: list[tuple[Any, bool]] = [(code, False)]
+    while stack:
+        current, operands_done = stack.pop()
+        if isinstance(current, tuple):
+            if not operands_done:
+                stack.append((current, True))
+                stack.extend((operand, False) for operand in reversed(current[1:]))
+            elif len(current) == 2:
+                values.append(_UNARY_OPS[current[0]](values.pop()))
+            else:
+                op = current[0]
+                right = values.pop()
+                left = values.pop()
+                _check_cost(op, left, right)
+                result = _BINARY_OPS[op](left, right)
+                _check_int(result)
+                values.append(result)
+        elif isinstance(current, str):
+            try:
+                values.append(variables[current])
+            except KeyError:
+                raise CalculationError(f"Unknown variable '{current}'") from None
+        else:
+            values.append(current)
+    return values.pop()
+
+
+def _check_cost(op: type[ast.operator], left: Number, right: Number) -> None:
+    """Reject integer operations whose result would exceed MAX_INT_BITS."""
+    if not (isinstance(left, int) and isinstance(right, int)):
+        return
+    if op is ast.Pow:
+        if right > 0 and abs(left) > 1:
+            if right.bit_length() > MAX_INT_BITS.bit_length():
+                raise CalculationError(f"Exponent is too large (limit {MAX_INT_BITS})")
+            bits = right * math.log2(abs(left))
+            if bits > MAX_INT_BITS:
+                raise CalculationError(
+                    f"Result is too large (about {bits:.3g} bits, limit {MAX_INT_BITS})"
+                )
+    elif op is ast.Mult:
+        # A product has the summed bit length of its factors, or one less
+        bits = left.bit_length() + right.bit_length() - 1
+        if bits > MAX_INT_BITS:
+            raise CalculationError(
+                f"Result is too large (about {bits} bits, limit {MAX_INT_BITS})"
+            )
+
+
+def _check_int(value: Any) -> None:
+    if isinstance(value, int) and value.bit_length() > MAX_INT_BITS:
+        raise CalculationError(
+            f"Number is too large ({value.bit_length()} bits, limit {MAX_INT_BITS})"
+        )
@@ -0,0 +1,325 @@
+"""Concurrency helpers for running tool handlers without blocking the event loop.
+
+The MCP low-level server dispatches every incoming request in its own task and
+writes each response as soon as it is ready, tagged with the originating
+request ID. That only gives real parallelism if handlers yield to the event
+loop, so blocking handlers are moved to worker threads.
+
+Each tool registered through :func:`tool` picks an :class:`ExecutorPolicy`:
+
+* ``inline`` runs the handler on the event loop thread. Only use this for
+  handlers that never block.
+* ``shared`` runs it in a bounded thread pool shared by all such tools.
+* ``dedicated`` runs it in a pool of its own, so it can neither starve nor be
+  starved by other tools.
+
+Pool sizes come from :class:`~mcp_server.server.ServerConfig`. On
+free-threaded CPython builds the worker threads execute Python code in
+parallel, so CPU-bound handlers can use every core in-process.
+"""
+
+import asyncio
+import contextvars
+import functools
+import inspect
+import logging
+import os
+import sys
+import threading
+from collections.abc import Awaitable, Callable
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+from typing import Any, ParamSpec, TypeVar, overload
+
+from fastmcp import FastMCP
+
+from mcp_server.server import ServerConfig
+
+logger = logging.getLogger(__name__)
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+
+class ExecutorPolicy(str, Enum):
+    """Where a tool handler is executed."""
+
+    INLINE = "inline"
+    SHARED = "shared"
+    DEDICATED = "dedicated"
+
+
+def gil_enabled() -> bool:
+    """Return whether the running interpreter has the GIL enabled."""
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return True if is_gil_enabled is None else bool(is_gil_enabled())
+
+
+def default_pool_size() -> int:
+    """
+    Pick a shared pool size suited to the running interpreter.
+
+    With the GIL, threads mostly help handlers that wait on I/O, so the pool
+    is sized like :class:`ThreadPoolExecutor`'s default. Without it, threads
+    run Python code in parallel and one worker per core is the sweet spot.
+
+    Returns:
+        The number of worker threads to use
+    """
+    cpus = os.cpu_count() or 1
+    if gil_enabled():
+        return min(32, cpus + 4)
+    return cpus
+
+
+class ExecutorPool:
+    """A named, bounded thread pool that keeps track of how busy it is."""
+
+    def __init__(self, name: str, max_workers: int) -> None:
+        self.name = name
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=f"mcp-{name}"
+        )
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._peak_in_flight = 0
+        self._completed = 0
+        self._cancelled = 0
+        self._saturation_events = 0
+
+    async def run(self, fn: Callable[P, R], *args: P.args, **kwargs: P.kwargs) -> R:
+        """
+        Run a blocking callable in this pool and await its result.
+
+        The caller's context variables are propagated to the worker thread.
+        A call stays in flight until its worker finishes, even if the caller
+        is cancelled first; the worker thread cannot be interrupted.
+        """
+        context = contextvars.copy_context()
+        call = functools.partial(fn, *args, **kwargs)
+        self._enter()
+        try:
+            future = self._executor.submit(context.run, call)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        cancelled = False
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        finally:
+            with self._lock:
+                if cancelled:
+                    self._cancelled += 1
+                else:
+                    self._completed += 1
+
+    def _enter(self) -> None:
+        with self._lock:
+            self._in_flight += 1
+            self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+            saturated = self._in_flight == self.max_workers + 1
+            if saturated:
+                self._saturation_events += 1
+        if saturated:
+            logger.warning(
+                "Executor pool '%s' is saturated: %d workers busy, calls are queueing",
+                self.name,
+                self.max_workers,
+            )
+
+    def _release(self, _future: Any = None) -> None:
+        """Mark a call as no longer occupying the pool."""
+        with self._lock:
+            self._in_flight -= 1
+
+    def stats(self) -> dict[str, Any]:
+        """Return a snapshot of the pool's utilisation."""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "in_flight": self._in_flight,
+                "queued": max(0, self._in_flight - self.max_workers),
+                "peak_in_flight": self._peak_in_flight,
+                "completed": self._completed,
+                "cancelled": self._cancelled,
+                "saturation_events": self._saturation_events,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop accepting work and release the worker threads."""
+        self._executor.shutdown(wait=wait)
+
+
+class ExecutorRegistry:
+    """Owns the shared pool and the per-tool dedicated pools."""
+
+    def __init__(self, config: ServerConfig | None = None) -> None:
+        self._config = config or ServerConfig()
+        self._lock = threading.Lock()
+        self._shared: ExecutorPool | None = None
+        self._dedicated: dict[str, ExecutorPool] = {}
+
+    def configure(self, config: ServerConfig) -> None:
+        """Apply new pool sizes. Existing pools are drained and recreated lazily."""
+        with self._lock:
+            pools = self._all_pools()
+            self._config = config
+            self._shared = None
+            self._dedicated = {}
+        for pool in pools:
+            pool.shutdown(wait=False)
+
+    def shared(self) -> ExecutorPool:
+        """Return the shared pool, creating it on first use."""
+        with self._lock:
+            if self._shared is None:
+                size = self._config.shared_pool_size or default_pool_size()
+                self._shared = ExecutorPool("shared", size)
+            return self._shared
+
+    def dedicated(self, name: str) -> ExecutorPool:
+        """Return the dedicated pool for ``name``, creating it on first use."""
+        with self._lock:
+            pool = self._dedicated.get(name)
+            if pool is None:
+                pool = ExecutorPool(name, self._config.dedicated_pool_size)
+                self._dedicated[name] = pool
+            return pool
+
+    def pool_for(self, policy: ExecutorPolicy, name: str) -> ExecutorPool | None:
+        """Return the pool a policy maps to, or ``None`` for inline execution."""
+        if policy is ExecutorPolicy.SHARED:
+            return self.shared()
+        if policy is ExecutorPolicy.DEDICATED:
+            return self.dedicated(name)
+        return None
+
+    def stats(self) -> dict[str, Any]:
+        """Return utilisation snapshots for every pool created so far."""
+        with self._lock:
+            shared = self._shared
+            dedicated = dict(self._dedicated)
+        return {
+            "gil_enabled": gil_enabled(),
+            "shared": shared.stats() if shared else None,
+            "dedicated": {name: pool.stats() for name, pool in dedicated.items()},
+        }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Shut down every pool."""
+        with self._lock:
+            pools = self._all_pools()
+            self._shared = None
+            self._dedicated = {}
+        for pool in pools:
+            pool.shutdown(wait=wait)
+
+    def _all_pools(self) -> list[ExecutorPool]:
+        pools = list(self._dedicated.values())
+        if self._shared is not None:
+            pools.append(self._shared)
+        return pools
+
+
+# Process-wide registry used by the registered tools
+executors = ExecutorRegistry()
+
+
+async def run_sync(fn: Callable[P, R], *args: P.args, **kwargs: P.kwargs) -> R:
+    """
+    Run a blocking callable in the shared pool and await its result.
+
+    Args:
+        fn: The blocking callable to run
+        *args: Positional arguments for ``fn``
+        **kwargs: Keyword arguments for ``fn``
+
+    Returns:
+        Whatever ``fn`` returns
+    """
+    return await executors.shared().run(fn, *args, **kwargs)
+
+
+@overload
+def offload(
+    fn: Callable[P, R], *, policy: ExecutorPolicy = ...
+) -> Callable[P, Awaitable[R]]: ...
+
+
+@overload
+def offload(
+    fn: None = None, *, policy: ExecutorPolicy = ...
+) -> Callable[[Callable[P, R]], Callable[P, Awaitable[R]]]: ...
+
+
+def offload(
+    fn: Callable[P, R] | None = None,
+    *,
+    policy: ExecutorPolicy = ExecutorPolicy.SHARED,
+) -> Any:
+    """
+    Wrap a blocking function so that calls to it run according to ``policy``.
+
+    The wrapper keeps the signature and docstring of ``fn`` so that FastMCP
+    derives the same tool schema as it would for the original function. Can
+    be used bare (``@offload``) or with arguments (``@offload(policy=...)``).
+
+    Args:
+        fn: The blocking function to wrap
+        policy: Which executor runs the calls; dedicated pools are keyed by
+            the function name
+
+    Returns:
+        An async function with the same signature as ``fn``
+    """
+
+    def decorator(func: Callable[P, R]) -> Callable[P, Awaitable[R]]:
+        name = func.__name__
+
+        @functools.wraps(func)
+        async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            pool = executors.pool_for(policy, name)
+            if pool is None:
+                return func(*args, **kwargs)
+            return await pool.run(func, *args, **kwargs)
+
+        return wrapper
+
+    if fn is None:
+        return decorator
+    return decorator(fn)
+
+
+def tool(
+    server: FastMCP,
+    *,
+    executor: ExecutorPolicy = ExecutorPolicy.SHARED,
+    **tool_kwargs: Any,
+) -> Callable[[Callable[..., Any]], Any]:
+    """
+    Register a function as an MCP tool with an executor policy.
+
+    Async functions always run on the event loop; ``executor`` only applies
+    to sync functions.
+
+    Args:
+        server: The FastMCP server to register the tool on
+        executor: Where calls to a sync handler are executed
+        **tool_kwargs: Passed through to ``server.tool()``
+
+    Returns:
+        A decorator that registers the function and returns the FastMCP tool
+    """
+
+    def decorator(fn: Callable[..., Any]) -> Any:
+        handler = fn
+        if not inspect.iscoroutinefunction(fn):
+            handler = offload(fn, policy=executor)
+        return server.tool(**tool_kwargs)(handler)
+
+    return decorator
@@ -0,0 +1,557 @@
+"""Gateway mode: compose backend MCP servers behind this one.
+
+Each backend is mounted under a namespace and its tools are exposed here as
+``<namespace>_<tool>``, so clients make one connection instead of one per
+backend. The gateway keeps a small pool of persistent sessions to every
+backend and reuses them across requests. Tool listings are fetched from all
+backends concurrently and cached for a configurable time; once a backend has
+been listed, an expired listing is still served while a background task
+refreshes it, so a stuck backend never delays ``tools/list``. Every backend has
+its own timeout and circuit breaker, so a slow or failing backend only
+affects its own tools. Local tools always take precedence: a backend tool
+whose namespaced name matches one of this server's tools is hidden.
+
+A backend is described by one of:
+
+* an ``http://`` or ``https://`` URL of a streamable HTTP server
+* a dict with ``command`` and optional ``args``, ``env`` and ``cwd`` to start
+  a stdio subprocess per pooled connection
+* a :class:`~fastmcp.FastMCP` instance, served in-process
+
+Backend connections are opened on first use and live until :meth:`Gateway.close`
+or process exit.
+"""
+
+import asyncio
+import contextlib
+import logging
+import re
+import time
+from collections.abc import Callable, Sequence
+from typing import Any, cast
+
+import mcp.types
+from fastmcp import Client, FastMCP
+from fastmcp.client.transports import StdioTransport
+from fastmcp.exceptions import ToolError
+from fastmcp.server.middleware import CallNext, Middleware, MiddlewareContext
+from fastmcp.tools.tool import Tool, ToolResult
+from mcp.shared.exceptions import McpError
+
+from mcp_server.server import ServerConfig
+
+logger = logging.getLogger(__name__)
+
+BackendSpec = str | dict[str, Any] | FastMCP
+
+_NAMESPACE_PATTERN = re.compile(r"^[A-Za-z][A-Za-z0-9-]*$")
+
+
+class BackendUnavailableError(ToolError):
+    """Raised when a backend cannot be reached, times out or is shed."""
+
+
+class CircuitBreaker:
+    """
+    Fail fast on a backend after repeated failures.
+
+    The breaker opens after ``threshold`` consecutive failures and rejects
+    calls for ``cooldown`` seconds. It then lets a single trial call through
+    (half-open); success closes it again and failure re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        threshold: int = 5,
+        cooldown: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._clock = clock
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        """The breaker's current state."""
+        if self._opened_at is None:
+            return self.CLOSED
+        if self._clock() - self._opened_at < self.cooldown:
+            return self.OPEN
+        return self.HALF_OPEN
+
+    def allow(self) -> bool:
+        """Return whether a call may be attempted now."""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        """Record a successful call."""
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    def record_cancelled(self) -> None:
+        """Record a call abandoned before it finished, e.g. by cancellation."""
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        """Record a failed call, opening the breaker if the limit is reached."""
+        self._failures += 1
+        if self._trial_in_flight or self._failures >= self.threshold:
+            if self._opened_at is None or self._trial_in_flight:
+                logger.warning(
+                    "Circuit breaker opened after %d consecutive failures",
+                    self._failures,
+                )
+            self._opened_at = self._clock()
+        self._trial_in_flight = False
+
+
+class _Connection:
+    """One pooled backend session."""
+
+    def __init__(self) -> None:
+        self.client: Client[Any] | None = None
+        self.in_flight = 0
+
+
+class GatewayTool(Tool):
+    """A backend tool exposed under the gateway's namespaced name."""
+
+    _backend: "Backend"
+    _remote_name: str
+
+    def __init__(self, backend: "Backend", remote_name: str, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self._backend = backend
+        self._remote_name = remote_name
+
+    @classmethod
+    def from_mcp_tool(cls, backend: "Backend", remote: mcp.types.Tool) -> "GatewayTool":
+        """Wrap a tool listed by a backend."""
+        return cls(
+            backend,
+            remote.name,
+            name=f"{backend.namespace}_{remote.name}",
+            title=remote.title,
+            description=remote.description,
+            parameters=remote.inputSchema,
+            output_schema=remote.outputSchema,
+            annotations=remote.annotations,
+        )
+
+    async def run(self, arguments: dict[str, Any]) -> ToolResult:
+        """Call the tool on its backend."""
+        return await self._backend.call_tool(self._remote_name, arguments)
+
+
+class Backend:
+    """A mounted backend server with pooled sessions, a timeout and a breaker."""
+
+    def __init__(
+        self,
+        namespace: str,
+        spec: BackendSpec,
+        *,
+        pool_size: int = 2,
+        timeout: float = 10.0,
+        list_ttl: float = 30.0,
+        breaker: CircuitBreaker | None = None,
+    ) -> None:
+        if not _NAMESPACE_PATTERN.match(namespace):
+            raise ValueError(
+                f"Invalid namespace '{namespace}': use letters, digits and "
+                "hyphens, starting with a letter"
+            )
+        if pool_size < 1:
+            raise ValueError("pool_size must be at least 1")
+        self.namespace = namespace
+        self.spec = spec
+        self.timeout = timeout
+        self.list_ttl = list_ttl
+        self.breaker = breaker or CircuitBreaker()
+        self._pool = [_Connection() for _ in range(pool_size)]
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._connect_lock = asyncio.Lock()
+        self._list_lock = asyncio.Lock()
+        self._tools: list[GatewayTool] = []
+        self._listed_at: float | None = None
+        self._listed = False
+        self._refresh_task: asyncio.Task[None] | None = None
+        self._calls = 0
+        self._failures = 0
+        self._timeouts = 0
+        self._rejected = 0
+
+    def _new_client(self) -> Client[Any]:
+        spec = self.spec
+        if isinstance(spec, dict):
+            transport = StdioTransport(
+                command=spec["command"],
+                args=list(spec.get("args", [])),
+                env=spec.get("env"),
+                cwd=spec.get("cwd"),
+            )
+            return Client(transport, init_timeout=self.timeout)
+        return Client(spec, init_timeout=self.timeout)
+
+    async def _acquire(self) -> _Connection:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Sessions belong to the loop that opened them; a new loop (such
+            # as a restarted server) starts over with a fresh pool.
+            self._loop = loop
+            self._pool = [_Connection() for _ in self._pool]
+            self._connect_lock = asyncio.Lock()
+        connection = min(self._pool, key=lambda c: c.in_flight)
+        connection.in_flight += 1
+        if connection.client is None:
+            try:
+                async with self._connect_lock:
+                    if connection.client is None:
+                        client = self._new_client()
+                        try:
+                            await asyncio.wait_for(client.__aenter__(), self.timeout)
+                        except BaseException:
+                            # Do not leave a half-open session or subprocess
+                            await self._close_client(client)
+                            raise
+                        connection.client = client
+            except BaseException:
+                connection.in_flight -= 1
+                raise
+        return connection
+
+    async def _discard(self, connection: _Connection) -> None:
+        client, connection.client = connection.client, None
+        if client is not None:
+            await self._close_client(client)
+
+    async def _close_client(self, client: Client[Any]) -> None:
+        with contextlib.suppress(Exception):
+            await asyncio.wait_for(client.close(), self.timeout)
+
+    async def _request(self, send: Callable[[Client[Any]], Any]) -> Any:
+        """Send one request over a pooled session, guarded by the breaker."""
+        if not self.breaker.allow():
+            self._rejected += 1
+            raise BackendUnavailableError(
+                f"Backend '{self.namespace}' is unavailable (circuit open)"
+            )
+        self._calls += 1
+        connection: _Connection | None = None
+        try:
+            connection = await self._acquire()
+            assert connection.client is not None
+            try:
+                result = await asyncio.wait_for(send(connection.client), self.timeout)
+            finally:
+                connection.in_flight -= 1
+        except McpError:
+            # The backend answered with a protocol error; it is healthy
+            self.breaker.record_success()
+            raise
+        except asyncio.TimeoutError as e:
+            self._timeouts += 1
+            self._failures += 1
+            self.breaker.record_failure()
+            raise BackendUnavailableError(
+                f"Backend '{self.namespace}' timed out after {self.timeout}s"
+            ) from e
+        except Exception as e:
+            self._failures += 1
+            self.breaker.record_failure()
+            if connection is not None:
+                await self._discard(connection)
+            raise BackendUnavailableError(
+                f"Backend '{self.namespace}' failed: {e}"
+            ) from e
+        except BaseException:
+            # Cancelled: neither a success nor a failure of the backend
+            self.breaker.record_cancelled()
+            raise
+        self.breaker.record_success()
+        return result
+
+    async def call_tool(self, name: str, arguments: dict[str, Any]) -> ToolResult:
+        """
+        Call a tool on this backend.
+
+        Args:
+            name: The tool's name on the backend, without the namespace
+            arguments: Arguments to pass to the tool
+
+        Returns:
+            The backend's result
+
+        Raises:
+            ToolError: If the backend reports an error, or
+                BackendUnavailableError if it cannot be reached in time
+        """
+        try:
+            result = cast(
+                mcp.types.CallToolResult,
+                await self._request(lambda c: c.call_tool_mcp(name, arguments)),
+            )
+        except McpError as e:
+            raise ToolError(str(e)) from e
+        if result.isError:
+            text = next(
+                (
+                    c.text
+                    for c in result.content
+                    if isinstance(c, mcp.types.TextContent)
+                ),
+                f"Tool '{name}' failed on backend '{self.namespace}'",
+            )
+            raise ToolError(text)
+        return ToolResult(
+            content=result.content,
+            structured_content=result.structuredContent,
+        )
+
+    async def list_tools(self) -> list[GatewayTool]:
+        """
+        Return this backend's tools, refreshing the cache when it is stale.
+
+        Only the first listing is waited for. After that a stale listing is
+        returned at once and refreshed in the background. If the backend
+        cannot be listed the previous listing, possibly empty, is served.
+        """
+        if not self._fresh():
+            if self._listed:
+                self._start_refresh()
+            else:
+                await self._refresh()
+        return self._tools
+
+    def _start_refresh(self) -> None:
+        task = self._refresh_task
+        loop = asyncio.get_running_loop()
+        if task is None or task.done() or task.get_loop() is not loop:
+            self._refresh_task = loop.create_task(self._refresh())
+
+    async def _refresh(self) -> None:
+        async with self._list_lock:
+            if self._fresh():
+                return
+            try:
+                remote = cast(
+                    list[mcp.types.Tool],
+                    await self._request(lambda c: c.list_tools()),
+                )
+            except (BackendUnavailableError, McpError) as e:
+                logger.warning("Could not list tools of '%s': %s", self.namespace, e)
+                return
+            self._tools = [GatewayTool.from_mcp_tool(self, tool) for tool in remote]
+            self._listed_at = time.monotonic()
+            self._listed = True
+
+    def _fresh(self) -> bool:
+        return (
+            self._listed_at is not None
+            and time.monotonic() - self._listed_at < self.list_ttl
+        )
+
+    def invalidate(self) -> None:
+        """Drop the cached tool listing."""
+        self._listed_at = None
+
+    async def close(self) -> None:
+        """Stop any listing refresh and close all pooled sessions."""
+        task, self._refresh_task = self._refresh_task, None
+        if task is not None and task.get_loop() is asyncio.get_running_loop():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        for connection in self._pool:
+            await self._discard(connection)
+
+    def stats(self) -> dict[str, Any]:
+        """Return connection, call and breaker counters."""
+        return {
+            "state": self.breaker.state,
+            "connections": sum(c.client is not None for c in self._pool),
+            "pool_size": len(self._pool),
+            "in_flight": sum(c.in_flight for c in self._pool),
+            "calls": self._calls,
+            "failures": self._failures,
+            "timeouts": self._timeouts,
+            "rejected": self._rejected,
+            "tools": len(self._tools),
+        }
+
+
+class Gateway:
+    """Mounts backend servers and routes namespaced tool calls to them."""
+
+    def __init__(self, config: ServerConfig | None = None) -> None:
+        self._backends: dict[str, Backend] = {}
+        self._retired: list[Backend] = []
+        self.configure(config or ServerConfig())
+
+    def configure(self, config: ServerConfig) -> None:
+        """
+        Apply a configuration, mounting the backends it lists.
+
+        Backends whose spec is unchanged keep their open sessions; the rest
+        are closed on the next listing or on :meth:`close`.
+        """
+        self.pool_size = config.gateway_pool_size
+        self.timeout = config.gateway_timeout
+        self.list_ttl = config.gateway_list_ttl
+        self.breaker_threshold = config.gateway_breaker_threshold
+        self.breaker_cooldown = config.gateway_breaker_cooldown
+        previous = self._backends
+        self._backends = {}
+        for namespace, spec in config.gateway_backends.items():
+            backend = previous.pop(namespace, None)
+            if backend is not None and backend.spec == spec:
+                backend.timeout = self.timeout
+                backend.list_ttl = self.list_ttl
+                self._backends[namespace] = backend
+            else:
+                if backend is not None:
+                    self._retired.append(backend)
+                self.mount(namespace, spec)
+        self._retired.extend(previous.values())
+
+    def mount(
+        self,
+        namespace: str,
+        spec: BackendSpec,
+        *,
+        pool_size: int | None = None,
+        timeout: float | None = None,
+    ) -> Backend:
+        """
+        Mount a backend server under a namespace.
+
+        Calls to ``<namespace>_...`` are routed to the backend unless the
+        server the gateway is attached to has a local tool of that name.
+
+        Args:
+            namespace: Prefix for the backend's tools, e.g. ``"weather"``
+                exposes ``weather_forecast``
+            spec: URL, stdio command dict or FastMCP instance (see module docs)
+            pool_size: Sessions to keep open; defaults to the configured size
+            timeout: Seconds per request; defaults to the configured timeout
+
+        Returns:
+            The mounted backend
+        """
+        if namespace in self._backends:
+            raise ValueError(f"Namespace '{namespace}' is already mounted")
+        backend = Backend(
+            namespace,
+            spec,
+            pool_size=pool_size or self.pool_size,
+            timeout=timeout or self.timeout,
+            list_ttl=self.list_ttl,
+            breaker=CircuitBreaker(self.breaker_threshold, self.breaker_cooldown),
+        )
+        self._backends[namespace] = backend
+        return backend
+
+    @property
+    def backends(self) -> Sequence[Backend]:
+        """The mounted backends."""
+        return list(self._backends.values())
+
+    def backend_for(self, name: str) -> tuple[Backend, str] | None:
+        """Return the backend and remote tool name for a namespaced tool name."""
+        namespace, sep, remote_name = name.partition("_")
+        backend = self._backends.get(namespace)
+        if backend is None or not sep or not remote_name:
+            return None
+        return backend, remote_name
+
+    async def list_tools(self) -> list[GatewayTool]:
+        """List the tools of every backend, fetching stale listings concurrently."""
+        await self._close_retired()
+        listings = await asyncio.gather(
+            *(backend.list_tools() for backend in self._backends.values())
+        )
+        return [tool for listing in listings for tool in listing]
+
+    async def call_tool(self, name: str, arguments: dict[str, Any]) -> ToolResult:
+        """Call a namespaced tool on its backend."""
+        route = self.backend_for(name)
+        if route is None:
+            raise ToolError(f"Unknown gateway tool: {name}")
+        backend, remote_name = route
+        return await backend.call_tool(remote_name, arguments)
+
+    async def _close_retired(self) -> None:
+        retired, self._retired = self._retired, []
+        for backend in retired:
+            await backend.close()
+
+    async def close(self) -> None:
+        """Close the sessions of every backend."""
+        await self._close_retired()
+        for backend in self._backends.values():
+            await backend.close()
+
+    def stats(self) -> dict[str, Any]:
+        """Return per-backend connection, call and breaker counters."""
+        return {
+            namespace: backend.stats() for namespace, backend in self._backends.items()
+        }
+
+    def attach(self, server: FastMCP) -> None:
+        """
+        Expose the mounted backends' tools through ``server``.
+
+        Args:
+            server: The FastMCP server acting as the gateway
+        """
+        server.add_middleware(_GatewayMiddleware(self, server))
+
+
+class _GatewayMiddleware(Middleware):
+    """Merges backend tools into listings and routes their calls."""
+
+    def __init__(self, gateway: Gateway, server: FastMCP) -> None:
+        self.gateway = gateway
+        self.server = server
+
+    async def on_list_tools(
+        self,
+        context: MiddlewareContext[mcp.types.ListToolsRequest],
+        call_next: CallNext[mcp.types.ListToolsRequest, list[Tool]],
+    ) -> list[Tool]:
+        local = await call_next(context)
+        names = {tool.name for tool in local}
+        remote = [
+            tool for tool in await self.gateway.list_tools() if tool.name not in names
+        ]
+        return [*local, *remote]
+
+    async def on_call_tool(
+        self,
+        context: MiddlewareContext[mcp.types.CallToolRequestParams],
+        call_next: CallNext[mcp.types.CallToolRequestParams, ToolResult],
+    ) -> ToolResult:
+        name = context.message.name
+        if self.gateway.backend_for(name) is None:
+            return await call_next(context)
+        if name in await self.server.get_tools():
+            # A local tool shadows the backend's
+            return await call_next(context)
+        return await self.gateway.call_tool(name, context.message.arguments or {})
+
+
+# Process-wide gateway, configured from ServerConfig by mcp_server.main
+gateway = Gateway()
@@ -6,11 +6,32 @@ from typing import Any
 from fastmcp import FastMCP
 from pydantic import BaseModel
 
+from mcp_server.audit import audit_log, audited
+from mcp_server.calculator import (
+    ALLOWED_CHARS,
+    MAX_EXPRESSION_LENGTH,
+    VARIABLE_CHARS,
+    evaluate,
+    execute,
+)
+from mcp_server.concurrency import ExecutorPolicy, executors, tool
+from mcp_server.gateway import gateway
+from mcp_server.server import ServerConfig
+from mcp_server.sessions import current_session_id, sessions
+from mcp_server.subscriptions import subscriptions
+from mcp_server.traffic import traffic, warm_caches
+
 logger = logging.getLogger(__name__)
 
 # Create the FastMCP server instance
 mcp = FastMCP("Example MCP Server")
 
+# Active configuration, exposed through the config://settings resource
+config = ServerConfig()
+
+# Tools registered below, listed as capabilities in config://settings
+TOOLS = ("calculate", "list_variables", "clear_variables", "greet", "audit_query")
+
 
 class CalculateRequest(BaseModel):
     """Request model for calculate tool."""
@@ -25,24 +46,35 @@ class GreetRequest(BaseModel):
 
 
 # Define the actual functions first
-def _calculate(expression: str) -> str:
+def _calculate(expression: str, session_id: str | None = None) -> str:
     """
     Evaluate a mathematical expression safely.
 
     Args:
         expression: A mathematical expression to evaluate (e.g., "2 + 2", "10 * 5")
+        session_id: Session whose variables the expression may use and assign
+            (e.g., "x = 3 * 7", then "x / 2"); without one, only numbers are
+            allowed
 
     Returns:
         The result of the calculation as a string
     """
-    try:
-        # Simple evaluation for basic math operations
-        # In production, you'd want a more secure math parser
-        allowed_chars = set("0123456789+-*/.() ")
-        if not all(c in allowed_chars for c in expression):
-            return f"Error: Invalid characters in expression '{expression}'"
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        return (
+            f"Error: Expression is too long ({len(expression)} characters, "
+            f"limit {MAX_EXPRESSION_LENGTH})"
+        )
+    allowed = ALLOWED_CHARS if session_id is None else VARIABLE_CHARS
+    if not all(c in allowed for c in expression):
+        return f"Error: Invalid characters in expression '{expression}'"
 
-        result = eval(expression)
+    try:
+        if session_id is None:
+            result = evaluate(expression)
+        else:
+            name, result = execute(expression, sessions.variables(session_id))
+            if name is not None:
+                sessions.assign(session_id, name, result)
         return f"The result of '{expression}' is {result}"
     except Exception as e:
         return f"Error calculating '{expression}': {str(e)}"
@@ -61,23 +93,30 @@ def _greet(name: str) -> str:
     return f"Hello, {name}! Welcome to the MCP server."
 
 
-# Register as MCP tools
-@mcp.tool()
+# Register as MCP tools. Blocking handlers run in an executor pool and cheap
+# ones are async-native, so concurrent requests never queue behind each other
+# on the event loop.
+@tool(mcp, executor=ExecutorPolicy.SHARED)
+@audited
 def calculate(expression: str) -> str:
     """
     Evaluate a mathematical expression safely.
 
+    Results can be kept for later calls in this session by assigning them to
+    a variable, e.g. "x = 3 * 7" followed by "x / 2".
+
     Args:
         expression: A mathematical expression to evaluate (e.g., "2 + 2", "10 * 5")
 
     Returns:
         The result of the calculation as a string
     """
-    return _calculate(expression)
+    return _calculate(expression, current_session_id())
 
 
-@mcp.tool()
-def greet(name: str) -> str:
+@tool(mcp)
+@audited
+async def greet(name: str) -> str:
     """
     Generate a friendly greeting message.
 
@@ -90,6 +129,59 @@ def greet(name: str) -> str:
     return _greet(name)
 
 
+@tool(mcp)
+async def list_variables() -> dict[str, int | float | str]:
+    """
+    List the variables assigned with calculate in this session.
+
+    Returns:
+        Variable names and values; complex values are given as strings
+    """
+    session_id = current_session_id()
+    if session_id is None:
+        return {}
+    return {
+        name: str(value) if isinstance(value, complex) else value
+        for name, value in sessions.variables(session_id).items()
+    }
+
+
+@tool(mcp)
+async def clear_variables() -> str:
+    """
+    Delete all variables assigned with calculate in this session.
+
+    Returns:
+        A message with the number of variables deleted
+    """
+    session_id = current_session_id()
+    cleared = 0 if session_id is None else sessions.clear(session_id)
+    return f"Cleared {cleared} variables"
+
+
+@tool(mcp, executor=ExecutorPolicy.SHARED)
+def audit_query(
+    since: float | None = None,
+    until: float | None = None,
+    tool: str | None = None,
+    limit: int = 100,
+) -> list[dict[str, Any]]:
+    """
+    Query recent entries of the tool invocation audit log.
+
+    Args:
+        since: Only include calls made at or after this Unix timestamp
+        until: Only include calls made at or before this Unix timestamp
+        tool: Only include calls to this tool
+        limit: Maximum number of entries to return (most recent win)
+
+    Returns:
+        Matching audit entries, oldest first
+    """
+    entries = audit_log.query(since=since, until=until, tool=tool, limit=limit)
+    return [entry.model_dump(exclude_none=True) for entry in entries]
+
+
 def _get_settings() -> dict[str, Any]:
     """
     Get server configuration settings.
@@ -98,11 +190,11 @@ def _get_settings() -> dict[str, Any]:
         A dictionary containing server settings
     """
     return {
-        "server_name": "Example MCP Server",
-        "version": "0.1.0",
-        "capabilities": ["calculate", "greet"],
-        "max_connections": 100,
-        "timeout": 30,
+        "server_name": config.name,
+        "version": config.version,
+        "capabilities": list(TOOLS),
+        "max_connections": config.max_connections,
+        "timeout": config.timeout,
     }
 
 
@@ -136,13 +228,26 @@ This server provides the following capabilities:
 ## Tools:
 - **calculate**: Evaluate mathematical expressions
   - Usage: calculate(expression="2 + 2")
+  - Variables: calculate(expression="x = 3 * 7"), then calculate(expression="x / 2")
+
+- **list_variables**: Show the variables assigned in this session
+  - Usage: list_variables()
+
+- **clear_variables**: Delete the variables assigned in this session
+  - Usage: clear_variables()
 
 - **greet**: Generate friendly greeting messages
   - Usage: greet(name="World")
 
+- **audit_query**: Look up recent tool calls in the audit log
+  - Usage: audit_query(since=1700000000, tool="calculate", limit=20)
+
 ## Resources:
 - **config://settings**: Server configuration settings
 - **info://server**: General server information
+- **stats://executors**: Tool executor pool utilisation
+- **stats://gateway**: Backend connections and circuit breakers in gateway mode
+- **stats://sessions**: Size and evictions of the session variable store
 
 ## Prompts:
 - **help**: This help message
@@ -152,7 +257,7 @@ For more information, check the server documentation.
 
 
 @mcp.resource("config://settings")
-def get_settings() -> dict[str, Any]:
+async def get_settings() -> dict[str, Any]:
     """
     Get server configuration settings.
 
@@ -163,7 +268,7 @@ def get_settings() -> dict[str, Any]:
 
 
 @mcp.resource("info://server")
-def get_server_info() -> dict[str, Any]:
+async def get_server_info() -> dict[str, Any]:
     """
     Get general server information.
 
@@ -173,8 +278,41 @@ def get_server_info() -> dict[str, Any]:
     return _get_server_info()
 
 
+@mcp.resource("stats://executors")
+async def get_executor_stats() -> dict[str, Any]:
+    """
+    Get utilisation of the thread pools that run blocking tool handlers.
+
+    Returns:
+        A dictionary with per-pool in-flight, queued and saturation counts
+    """
+    return executors.stats()
+
+
+@mcp.resource("stats://gateway")
+async def get_gateway_stats() -> dict[str, Any]:
+    """
+    Get the state of the backend servers mounted in gateway mode.
+
+    Returns:
+        A dictionary with per-backend connection, call and breaker counters
+    """
+    return gateway.stats()
+
+
+@mcp.resource("stats://sessions")
+async def get_session_stats() -> dict[str, Any]:
+    """
+    Get the size and eviction counts of the session variable store.
+
+    Returns:
+        A dictionary with session, variable and byte counts
+    """
+    return sessions.stats()
+
+
 @mcp.prompt("help")
-def help_prompt() -> str:
+async def help_prompt() -> str:
     """
     Provide help information about available tools and resources.
 
@@ -184,9 +322,51 @@ def help_prompt() -> str:
     return _help_prompt()
 
 
+# Let clients subscribe to resources instead of polling them. The stats
+# resources change on every call without reporting it, so they are polled.
+subscriptions.attach(mcp)
+subscriptions.exclude("stats://executors", "stats://gateway", "stats://sessions")
+
+# Capture a sample of tool calls when configured; attached before the gateway
+# so that proxied calls are captured too
+traffic.attach(mcp)
+
+# Expose the tools of any mounted backend servers (gateway mode)
+gateway.attach(mcp)
+
+
+def apply_config(new_config: ServerConfig) -> None:
+    """
+    Make a configuration active and notify subscribers of config://settings.
+
+    Args:
+        new_config: The configuration to apply
+    """
+    global config
+    config = new_config
+    executors.configure(new_config)
+    audit_log.configure(new_config)
+    subscriptions.configure(new_config)
+    gateway.configure(new_config)
+    sessions.configure(new_config)
+    traffic.configure(new_config)
+    subscriptions.notify_changed("config://settings")
+
+
 def main() -> None:
     """Main entry point for the MCP server."""
-    logging.basicConfig(level=logging.INFO)
+    server_config = ServerConfig.from_env()
+    logging.basicConfig(level=server_config.log_level)
+    apply_config(server_config)
+    if server_config.warm_cache_path:
+        # Warming only saves time; a missing or unreadable file is not fatal
+        try:
+            warmed = warm_caches(server_config.warm_cache_path)
+            logger.info(
+                f"Warmed {warmed} expressions from {server_config.warm_cache_path}"
+            )
+        except Exception as e:
+            logger.warning(f"Cache warm-up skipped: {e}")
     logger.info("Starting MCP server...")
 
     try:
@@ -197,6 +377,10 @@ def main() -> None:
     except Exception as e:
         logger.error(f"Server error: {e}")
         raise
+    finally:
+        audit_log.close()
+        traffic.close()
+        executors.shutdown(wait=False)
 
 
 if __name__ == "__main__":
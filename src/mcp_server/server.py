@@ -1,6 +1,8 @@
 """Server utilities and configuration."""
 
+import json
 import logging
+import os
 from typing import Any
 
 logger = logging.getLogger(__name__)
@@ -15,6 +17,90 @@ class ServerConfig:
         self.max_connections = 100
         self.timeout = 30
         self.log_level = logging.INFO
+        # Worker threads for blocking tool handlers; None sizes the shared
+        # pool for the interpreter (see mcp_server.concurrency)
+        self.shared_pool_size: int | None = None
+        self.dedicated_pool_size = 4
+        # Audit log of tool invocations; disabled while the path is None
+        self.audit_log_path: str | None = None
+        self.audit_queue_size = 10_000
+        self.audit_overflow_policy = "drop"
+        self.audit_flush_interval = 1.0
+        self.audit_flush_bytes = 1024 * 1024
+        self.audit_max_bytes = 64 * 1024 * 1024
+        self.audit_backup_count = 5
+        # Seconds to merge resource change reports before notifying subscribers
+        self.resource_update_window = 0.05
+        # Gateway mode: backend servers mounted by namespace, each a URL or a
+        # stdio command dict (see mcp_server.gateway); empty disables it
+        self.gateway_backends: dict[str, Any] = {}
+        self.gateway_pool_size = 2
+        self.gateway_timeout = 10.0
+        self.gateway_list_ttl = 30.0
+        self.gateway_breaker_threshold = 5
+        self.gateway_breaker_cooldown = 30.0
+        # Per-session calculator variables (see mcp_server.sessions)
+        self.session_memory_budget = 16 * 1024 * 1024
+        self.session_max_values = 256
+        self.session_idle_ttl = 3600.0
+        # Traffic capture for replay and cache warm-up (see mcp_server.traffic);
+        # disabled while the path is None
+        self.capture_path: str | None = None
+        self.capture_sample_rate = 1.0
+        self.warm_cache_path: str | None = None
+
+    @classmethod
+    def from_env(cls) -> "ServerConfig":
+        """Create a configuration with overrides from environment variables."""
+        config = cls()
+        log_level = os.environ.get("LOG_LEVEL")
+        if log_level:
+            level = logging.getLevelName(log_level.upper())
+            if isinstance(level, int):
+                config.log_level = level
+        shared_pool_size = os.environ.get("MCP_SHARED_POOL_SIZE")
+        if shared_pool_size:
+            config.shared_pool_size = int(shared_pool_size)
+        dedicated_pool_size = os.environ.get("MCP_DEDICATED_POOL_SIZE")
+        if dedicated_pool_size:
+            config.dedicated_pool_size = int(dedicated_pool_size)
+        audit_log_path = os.environ.get("MCP_AUDIT_LOG")
+        if audit_log_path:
+            config.audit_log_path = audit_log_path
+        audit_queue_size = os.environ.get("MCP_AUDIT_QUEUE_SIZE")
+        if audit_queue_size:
+            config.audit_queue_size = int(audit_queue_size)
+        audit_overflow_policy = os.environ.get("MCP_AUDIT_OVERFLOW")
+        if audit_overflow_policy:
+            config.audit_overflow_policy = audit_overflow_policy
+        gateway_backends = os.environ.get("MCP_GATEWAY_BACKENDS")
+        if gateway_backends:
+            config.gateway_backends = json.loads(gateway_backends)
+        gateway_pool_size = os.environ.get("MCP_GATEWAY_POOL_SIZE")
+        if gateway_pool_size:
+            config.gateway_pool_size = int(gateway_pool_size)
+        gateway_timeout = os.environ.get("MCP_GATEWAY_TIMEOUT")
+        if gateway_timeout:
+            config.gateway_timeout = float(gateway_timeout)
+        session_memory_budget = os.environ.get("MCP_SESSION_MEMORY_BUDGET")
+        if session_memory_budget:
+            config.session_memory_budget = int(session_memory_budget)
+        session_max_values = os.environ.get("MCP_SESSION_MAX_VALUES")
+        if session_max_values:
+            config.session_max_values = int(session_max_values)
+        session_idle_ttl = os.environ.get("MCP_SESSION_IDLE_TTL")
+        if session_idle_ttl:
+            config.session_idle_ttl = float(session_idle_ttl)
+        capture_path = os.environ.get("MCP_CAPTURE")
+        if capture_path:
+            config.capture_path = capture_path
+        capture_sample_rate = os.environ.get("MCP_CAPTURE_SAMPLE_RATE")
+        if capture_sample_rate:
+            config.capture_sample_rate = float(capture_sample_rate)
+        warm_cache_path = os.environ.get("MCP_WARM_CACHE")
+        if warm_cache_path:
+            config.warm_cache_path = warm_cache_path
+        return config
 
     def to_dict(self) -> dict[str, Any]:
         """Convert configuration to dictionary."""
@@ -24,6 +110,28 @@ class ServerConfig:
             "max_connections": self.max_connections,
             "timeout": self.timeout,
             "log_level": self.log_level,
+            "shared_pool_size": self.shared_pool_size,
+            "dedicated_pool_size": self.dedicated_pool_size,
+            "audit_log_path": self.audit_log_path,
+            "audit_queue_size": self.audit_queue_size,
+            "audit_overflow_policy": self.audit_overflow_policy,
+            "audit_flush_interval": self.audit_flush_interval,
+            "audit_flush_bytes": self.audit_flush_bytes,
+            "audit_max_bytes": self.audit_max_bytes,
+            "audit_backup_count": self.audit_backup_count,
+            "resource_update_window": self.resource_update_window,
+            "gateway_backends": self.gateway_backends,
+            "gateway_pool_size": self.gateway_pool_size,
+            "gateway_timeout": self.gateway_timeout,
+            "gateway_list_ttl": self.gateway_list_ttl,
+            "gateway_breaker_threshold": self.gateway_breaker_threshold,
+            "gateway_breaker_cooldown": self.gateway_breaker_cooldown,
+            "session_memory_budget": self.session_memory_budget,
+            "session_max_values": self.session_max_values,
+            "session_idle_ttl": self.session_idle_ttl,
+            "capture_path": self.capture_path,
+            "capture_sample_rate": self.capture_sample_rate,
+            "warm_cache_path": self.warm_cache_path,
         }
 
 
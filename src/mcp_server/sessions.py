@@ -0,0 +1,206 @@
+"""Per-session variables for the calculate tool.
+
+Each client session gets its own set of named values, so an agent can assign
+``x = 3 * 7`` once and use ``x / 2`` later instead of re-sending the literal.
+The store is bounded in three ways:
+
+* each session may hold at most ``session_max_values`` variables
+* all sessions together may use at most ``session_memory_budget`` bytes
+  (estimated); when an assignment would exceed it, the least recently used
+  other sessions are evicted
+* sessions unused for ``session_idle_ttl`` seconds are dropped
+
+Sessions are kept in least-recently-used order, so finding eviction
+candidates is cheap no matter how many sessions exist.
+"""
+
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Any
+
+from mcp_server.calculator import Number
+from mcp_server.server import ServerConfig
+
+logger = logging.getLogger(__name__)
+
+# Estimated bytes per session and per variable on top of the values themselves
+SESSION_OVERHEAD = 512
+ENTRY_OVERHEAD = 64
+
+
+class SessionLimitError(ValueError):
+    """Raised when an assignment would exceed a session store limit."""
+
+
+def current_session_id() -> str | None:
+    """Return the MCP session ID of the current request, if there is one."""
+    from fastmcp.server.dependencies import get_context
+
+    try:
+        return get_context().session_id
+    except RuntimeError:
+        return None
+
+
+def entry_size(name: str, value: Number) -> int:
+    """Estimate the memory held by one stored variable."""
+    return sys.getsizeof(name) + sys.getsizeof(value) + ENTRY_OVERHEAD
+
+
+class _Session:
+    """Variables of one session and their estimated size."""
+
+    __slots__ = ("values", "size", "last_used")
+
+    def __init__(self, now: float) -> None:
+        self.values: dict[str, Number] = {}
+        self.size = SESSION_OVERHEAD
+        self.last_used = now
+
+
+class SessionStore:
+    """Named values per session, within a global memory budget."""
+
+    def __init__(
+        self,
+        config: ServerConfig | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._lock = threading.Lock()
+        self._clock = clock
+        self._sessions: OrderedDict[str, _Session] = OrderedDict()
+        self._size = 0
+        self._evicted = 0
+        self._expired = 0
+        self.configure(config or ServerConfig())
+
+    def configure(self, config: ServerConfig) -> None:
+        """Apply a configuration."""
+        with self._lock:
+            self.memory_budget = config.session_memory_budget
+            self.max_values = config.session_max_values
+            self.idle_ttl = config.session_idle_ttl
+            self._expire(self._clock())
+            self._evict(0, keep=None)
+
+    def variables(self, session_id: str) -> dict[str, Number]:
+        """
+        Return a copy of a session's variables, marking the session as used.
+
+        Args:
+            session_id: The session to read
+
+        Returns:
+            The session's variables; empty for an unknown session
+        """
+        with self._lock:
+            now = self._clock()
+            self._expire(now)
+            session = self._sessions.get(session_id)
+            if session is None:
+                return {}
+            self._touch(session_id, session, now)
+            return dict(session.values)
+
+    def assign(self, session_id: str, name: str, value: Number) -> None:
+        """
+        Store a variable, evicting idle sessions if the budget requires it.
+
+        Args:
+            session_id: The session that owns the variable
+            name: The variable name
+            value: The value to store
+
+        Raises:
+            SessionLimitError: If the session already holds the maximum number
+                of variables, or the value does not fit in the budget
+        """
+        with self._lock:
+            now = self._clock()
+            self._expire(now)
+            session = self._sessions.get(session_id)
+            is_new_session = session is None
+            if session is None:
+                session = _Session(now)
+            old_size = 0
+            if name in session.values:
+                old_size = entry_size(name, session.values[name])
+            elif len(session.values) >= self.max_values:
+                raise SessionLimitError(
+                    f"Too many variables in this session (limit {self.max_values})"
+                )
+            session_size = session.size + entry_size(name, value) - old_size
+            added = session_size - (0 if is_new_session else session.size)
+            if session_size > self.memory_budget:
+                raise SessionLimitError(
+                    f"Session variables would exceed the memory budget "
+                    f"({self.memory_budget} bytes)"
+                )
+            self._evict(added, keep=session_id)
+            session.values[name] = value
+            session.size = session_size
+            self._size += added
+            self._sessions[session_id] = session
+            self._touch(session_id, session, now)
+
+    def clear(self, session_id: str) -> int:
+        """
+        Delete all variables of a session.
+
+        Returns:
+            The number of variables deleted
+        """
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            if session is None:
+                return 0
+            self._size -= session.size
+            return len(session.values)
+
+    def stats(self) -> dict[str, Any]:
+        """Return the store's size and eviction counters."""
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "variables": sum(len(s.values) for s in self._sessions.values()),
+                "bytes": self._size,
+                "memory_budget": self.memory_budget,
+                "evicted_sessions": self._evicted,
+                "expired_sessions": self._expired,
+            }
+
+    def _touch(self, session_id: str, session: _Session, now: float) -> None:
+        session.last_used = now
+        self._sessions.move_to_end(session_id)
+
+    def _expire(self, now: float) -> None:
+        """Drop sessions idle for longer than the TTL; call with the lock held."""
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session.last_used < self.idle_ttl:
+                break
+            del self._sessions[session_id]
+            self._size -= session.size
+            self._expired += 1
+
+    def _evict(self, needed: int, keep: str | None) -> None:
+        """Evict least recently used sessions until ``needed`` more bytes fit."""
+        if self._size + needed <= self.memory_budget:
+            return
+        for session_id in list(self._sessions):
+            if self._size + needed <= self.memory_budget:
+                break
+            if session_id == keep:
+                continue
+            session = self._sessions.pop(session_id)
+            self._size -= session.size
+            self._evicted += 1
+            logger.debug("Evicted idle session %s (%d bytes)", session_id, session.size)
+
+
+# Process-wide session store used by the calculate tool
+sessions = SessionStore()
@@ -0,0 +1,301 @@
+"""Soak test harness that looks for memory growth across many tool calls.
+
+Drives a mixed workload of tool calls, resource reads and prompt renders
+through an in-memory FastMCP client, periodically snapshotting traced memory,
+live object counts and process RSS. After a warm-up period the per-call
+growth is estimated with a least-squares fit; if it trends upward beyond the
+configured thresholds the run fails and reports the allocation sites that
+grew the most.
+
+Run it with::
+
+    python -m mcp_server.soak --calls 1000000
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import os
+import random
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable, Sequence
+from typing import Any
+
+from fastmcp import Client, FastMCP
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+# (kind, target, arguments) where kind is "tool", "resource" or "prompt"
+Operation = tuple[str, str, dict[str, Any]]
+Workload = Callable[[random.Random], Operation]
+
+
+class SoakSample(BaseModel):
+    """Memory measurements taken after a number of calls."""
+
+    calls: int
+    elapsed: float
+    traced_bytes: int
+    objects: int
+    rss_bytes: int | None = None
+
+
+class SoakReport(BaseModel):
+    """Outcome of a soak run."""
+
+    calls: int
+    duration: float
+    bytes_per_call: float
+    objects_per_call: float
+    rss_growth_bytes: int | None = None
+    samples: list[SoakSample]
+    top_growth: list[str]
+    failures: list[str]
+
+    @property
+    def passed(self) -> bool:
+        """Whether no growth threshold was exceeded."""
+        return not self.failures
+
+
+def default_workload(rng: random.Random) -> Operation:
+    """Pick a call from the mix of this server's tools, resources and prompts."""
+    roll = rng.random()
+    if roll < 0.5:
+        a, b = rng.randrange(1000), rng.randrange(1, 1000)
+        op = rng.choice("+-*/")
+        return "tool", "calculate", {"expression": f"{a} {op} {b}"}
+    if roll < 0.8:
+        return "tool", "greet", {"name": f"user{rng.randrange(10_000)}"}
+    if roll < 0.95:
+        uri = rng.choice(["config://settings", "info://server"])
+        return "resource", uri, {}
+    return "prompt", "help", {}
+
+
+def current_rss() -> int | None:
+    """Return the process's resident set size in bytes, if it can be read."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as statm:
+            pages = int(statm.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss is the peak, not the current size: kilobytes on Linux,
+    # bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def slope(xs: Sequence[float], ys: Sequence[float]) -> float:
+    """Return the least-squares slope of ``ys`` against ``xs``."""
+    n = len(xs)
+    if n < 2:
+        return 0.0
+    mean_x = sum(xs) / n
+    mean_y = sum(ys) / n
+    var_x = sum((x - mean_x) ** 2 for x in xs)
+    if var_x == 0:
+        return 0.0
+    cov = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys, strict=True))
+    return cov / var_x
+
+
+async def _perform(client: Client, operation: Operation) -> None:
+    kind, target, arguments = operation
+    if kind == "tool":
+        await client.call_tool(target, arguments)
+    elif kind == "resource":
+        await client.read_resource(target)
+    elif kind == "prompt":
+        await client.get_prompt(target, arguments)
+    else:
+        raise ValueError(f"Unknown operation kind '{kind}'")
+
+
+def _take_sample(calls: int, started: float) -> SoakSample:
+    gc.collect()
+    return SoakSample(
+        calls=calls,
+        elapsed=time.perf_counter() - started,
+        traced_bytes=tracemalloc.get_traced_memory()[0],
+        objects=len(gc.get_objects()),
+        rss_bytes=current_rss(),
+    )
+
+
+async def run_soak(
+    server: FastMCP | None = None,
+    *,
+    calls: int = 1_000_000,
+    sample_every: int = 10_000,
+    warmup_calls: int | None = None,
+    concurrency: int = 8,
+    session_calls: int = 50_000,
+    max_bytes_per_call: float = 4.0,
+    max_objects_per_call: float = 0.05,
+    top: int = 10,
+    workload: Workload = default_workload,
+    seed: int = 0,
+) -> SoakReport:
+    """
+    Drive a workload through an in-memory client and check for memory growth.
+
+    Args:
+        server: The server to soak; defaults to this package's server
+        calls: Total number of operations to perform
+        sample_every: Operations between memory samples
+        warmup_calls: Operations before the baseline is taken, so caches and
+            pools can fill; defaults to ``sample_every``
+        concurrency: Operations in flight at once on the session
+        session_calls: Operations per client session before reconnecting, so
+            per-session state that is never released shows up as growth
+        max_bytes_per_call: Largest acceptable traced-memory growth per call
+        max_objects_per_call: Largest acceptable live-object growth per call
+        top: Number of growing allocation sites to report
+        workload: Picks each operation
+        seed: Seed for the workload's random choices
+
+    Returns:
+        The soak report; check ``passed``
+    """
+    if server is None:
+        from mcp_server.main import mcp
+
+        server = mcp
+    if warmup_calls is None:
+        warmup_calls = sample_every
+    rng = random.Random(seed)
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+
+    samples: list[SoakSample] = []
+    baseline: tracemalloc.Snapshot | None = None
+    started = time.perf_counter()
+    done = 0
+    try:
+        while done < calls:
+            async with Client(server) as client:
+                session_end = min(calls, done + session_calls)
+                while done < session_end:
+                    batch = min(concurrency, session_end - done)
+                    await asyncio.gather(
+                        *(_perform(client, workload(rng)) for _ in range(batch))
+                    )
+                    before = done
+                    done += batch
+                    if baseline is None and done >= warmup_calls:
+                        samples.append(_take_sample(done, started))
+                        baseline = tracemalloc.take_snapshot()
+                    elif baseline is not None and (
+                        done // sample_every > before // sample_every
+                    ):
+                        samples.append(_take_sample(done, started))
+        if baseline is None:
+            raise ValueError("calls must be larger than warmup_calls")
+        samples.append(_take_sample(done, started))
+        final = tracemalloc.take_snapshot()
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
+
+    xs = [float(s.calls) for s in samples]
+    bytes_per_call = slope(xs, [float(s.traced_bytes) for s in samples])
+    objects_per_call = slope(xs, [float(s.objects) for s in samples])
+    rss_growth = None
+    if samples[0].rss_bytes is not None and samples[-1].rss_bytes is not None:
+        rss_growth = samples[-1].rss_bytes - samples[0].rss_bytes
+
+    filters = [
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+    ]
+    growth = final.filter_traces(filters).compare_to(
+        baseline.filter_traces(filters), "lineno"
+    )
+    top_growth = [str(stat) for stat in growth if stat.size_diff > 0][:top]
+
+    failures = []
+    if bytes_per_call > max_bytes_per_call:
+        failures.append(
+            f"Traced memory grows {bytes_per_call:.2f} bytes per call "
+            f"(limit {max_bytes_per_call})"
+        )
+    if objects_per_call > max_objects_per_call:
+        failures.append(
+            f"Live objects grow {objects_per_call:.4f} per call "
+            f"(limit {max_objects_per_call})"
+        )
+
+    return SoakReport(
+        calls=done,
+        duration=time.perf_counter() - started,
+        bytes_per_call=bytes_per_call,
+        objects_per_call=objects_per_call,
+        rss_growth_bytes=rss_growth,
+        samples=samples,
+        top_growth=top_growth,
+        failures=failures,
+    )
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Command line entry point; returns the process exit code."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=1_000_000)
+    parser.add_argument("--sample-every", type=int, default=10_000)
+    parser.add_argument("--warmup-calls", type=int, default=None)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--session-calls", type=int, default=50_000)
+    parser.add_argument("--max-bytes-per-call", type=float, default=4.0)
+    parser.add_argument("--max-objects-per-call", type=float, default=0.05)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print the full report")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    report = asyncio.run(
+        run_soak(
+            calls=args.calls,
+            sample_every=args.sample_every,
+            warmup_calls=args.warmup_calls,
+            concurrency=args.concurrency,
+            session_calls=args.session_calls,
+            max_bytes_per_call=args.max_bytes_per_call,
+            max_objects_per_call=args.max_objects_per_call,
+            top=args.top,
+            seed=args.seed,
+        )
+    )
+
+    if args.json:
+        print(json.dumps(report.model_dump(), indent=2))
+    else:
+        print(
+            f"{report.calls} calls in {report.duration:.1f}s: "
+            f"{report.bytes_per_call:.2f} bytes/call, "
+            f"{report.objects_per_call:.4f} objects/call, "
+            f"RSS growth {report.rss_growth_bytes} bytes"
+        )
+        for failure in report.failures:
+            print(f"FAIL: {failure}")
+        if report.failures:
+            print("Top growing allocation sites:")
+            for line in report.top_growth:
+                print(f"  {line}")
+    return 0 if report.passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,219 @@
+"""Resource subscriptions with coalesced change notifications.
+
+Clients subscribe to a resource URI with ``resources/subscribe`` and are sent
+``notifications/resources/updated`` when its content changes, instead of
+polling it. Code that changes the data behind a resource calls
+:meth:`SubscriptionManager.notify_changed`. Calls made within one coalescing
+window are merged, and the resource is then re-read and hashed. A
+notification goes out only if the content differs from what subscribers last
+saw. Sessions served by different event loops are tracked separately, so each
+loop compares against the content its own subscribers last saw.
+
+Resources that change all the time without reporting it, such as live
+counters, can be excluded with :meth:`SubscriptionManager.exclude`;
+subscribing to them fails instead of waiting for updates that never come.
+"""
+
+import asyncio
+import hashlib
+import logging
+import threading
+import weakref
+from typing import Any
+
+from fastmcp import FastMCP
+from mcp import types
+from mcp.server.session import ServerSession
+from pydantic import AnyUrl
+
+from mcp_server.server import ServerConfig
+
+logger = logging.getLogger(__name__)
+
+
+class SubscriptionManager:
+    """Tracks subscribers per resource URI and pushes update notifications."""
+
+    def __init__(self, config: ServerConfig | None = None) -> None:
+        self._lock = threading.Lock()
+        self._server: FastMCP | None = None
+        self._subscribers: dict[
+            str, weakref.WeakKeyDictionary[ServerSession, asyncio.AbstractEventLoop]
+        ] = {}
+        # Content hash last seen by the subscribers on each loop, per URI
+        self._digests: dict[tuple[asyncio.AbstractEventLoop, str], str] = {}
+        self._excluded: set[str] = set()
+        self._pending: dict[asyncio.AbstractEventLoop, set[str]] = {}
+        self._tasks: set[asyncio.Task[None]] = set()
+        self._notifications_sent = 0
+        self.configure(config or ServerConfig())
+
+    def configure(self, config: ServerConfig) -> None:
+        """Apply a configuration."""
+        self.coalesce_window = config.resource_update_window
+
+    def attach(self, server: FastMCP) -> None:
+        """
+        Handle subscribe/unsubscribe requests for ``server``'s resources.
+
+        Args:
+            server: The FastMCP server whose resources can be subscribed to
+        """
+        self._server = server
+        lowlevel = server._mcp_server
+
+        @lowlevel.subscribe_resource()
+        async def handle_subscribe(uri: AnyUrl) -> None:
+            await self.subscribe(str(uri), lowlevel.request_context.session)
+
+        @lowlevel.unsubscribe_resource()
+        async def handle_unsubscribe(uri: AnyUrl) -> None:
+            self.unsubscribe(str(uri), lowlevel.request_context.session)
+
+        # The low-level server always advertises subscribe=False, so flip it
+        # now that the handlers exist.
+        get_capabilities = lowlevel.get_capabilities
+
+        def get_capabilities_with_subscribe(
+            *args: Any, **kwargs: Any
+        ) -> types.ServerCapabilities:
+            capabilities = get_capabilities(*args, **kwargs)
+            if capabilities.resources is not None:
+                capabilities.resources.subscribe = True
+            return capabilities
+
+        lowlevel.get_capabilities = get_capabilities_with_subscribe  # type: ignore[method-assign]
+
+    def exclude(self, *uris: str) -> None:
+        """Refuse subscriptions to resources that never report their changes."""
+        with self._lock:
+            self._excluded.update(uris)
+
+    async def subscribe(self, uri: str, session: ServerSession) -> None:
+        """
+        Subscribe a session to a resource.
+
+        The current content is hashed so later change reports can be checked
+        against it. The resource is read before anything is registered, so
+        subscribing to an unknown resource fails without leaving a subscriber.
+
+        Raises:
+            ValueError: If the resource is excluded from subscriptions
+        """
+        if uri in self._excluded:
+            raise ValueError(
+                f"Resource {uri} does not report changes; read it to poll instead"
+            )
+        loop = asyncio.get_running_loop()
+        digest = await self._digest(uri)
+        with self._lock:
+            subscribers = self._subscribers.setdefault(uri, weakref.WeakKeyDictionary())
+            subscribers[session] = loop
+            self._digests.setdefault((loop, uri), digest)
+        logger.debug("Session subscribed to %s", uri)
+
+    def unsubscribe(self, uri: str, session: ServerSession) -> None:
+        """Remove a session's subscription to a resource."""
+        with self._lock:
+            subscribers = self._subscribers.get(uri)
+            if subscribers is None:
+                return
+            loop = subscribers.pop(session, None)
+            if loop is not None and loop not in subscribers.values():
+                self._digests.pop((loop, uri), None)
+            if not subscribers:
+                del self._subscribers[uri]
+
+    def subscriber_count(self, uri: str) -> int:
+        """Return how many sessions are subscribed to ``uri``."""
+        with self._lock:
+            return len(self._subscribers.get(uri, ()))
+
+    def stats(self) -> dict[str, Any]:
+        """Return subscriber counts per URI and the notifications sent."""
+        with self._lock:
+            return {
+                "subscribers": {
+                    uri: len(sessions) for uri, sessions in self._subscribers.items()
+                },
+                "notifications_sent": self._notifications_sent,
+            }
+
+    def notify_changed(self, uri: str) -> None:
+        """
+        Report that the data behind ``uri`` may have changed.
+
+        Safe to call from any thread. Does nothing if nobody is subscribed.
+        """
+        with self._lock:
+            subscribers = self._subscribers.get(uri)
+            loops = set(subscribers.values()) if subscribers else set()
+            scheduled = []
+            for loop in loops:
+                pending = self._pending.get(loop)
+                if pending is None:
+                    self._pending[loop] = {uri}
+                    scheduled.append(loop)
+                else:
+                    pending.add(uri)
+        for loop in scheduled:
+            try:
+                loop.call_soon_threadsafe(self._schedule_flush, loop)
+            except RuntimeError:
+                # The loop has closed; its sessions are gone with it
+                with self._lock:
+                    self._pending.pop(loop, None)
+
+    def _schedule_flush(self, loop: asyncio.AbstractEventLoop) -> None:
+        task = loop.create_task(self._flush_after_window(loop))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _flush_after_window(self, loop: asyncio.AbstractEventLoop) -> None:
+        await asyncio.sleep(self.coalesce_window)
+        with self._lock:
+            uris = self._pending.pop(loop, set())
+        for uri in sorted(uris):
+            try:
+                await self._publish(uri, loop)
+            except Exception:
+                logger.exception("Failed to publish update for %s", uri)
+
+    async def _publish(self, uri: str, loop: asyncio.AbstractEventLoop) -> None:
+        digest = await self._digest(uri)
+        with self._lock:
+            sessions = [
+                session
+                for session, session_loop in self._subscribers.get(uri, {}).items()
+                if session_loop is loop
+            ]
+            if not sessions:
+                self._digests.pop((loop, uri), None)
+                return
+            if self._digests.get((loop, uri)) == digest:
+                return
+            self._digests[(loop, uri)] = digest
+        for session in sessions:
+            try:
+                await session.send_resource_updated(AnyUrl(uri))
+            except Exception:
+                logger.debug("Dropping subscriber of %s after failed send", uri)
+                self.unsubscribe(uri, session)
+                continue
+            with self._lock:
+                self._notifications_sent += 1
+
+    async def _digest(self, uri: str) -> str:
+        if self._server is None:
+            raise RuntimeError("SubscriptionManager is not attached to a server")
+        contents = await self._server._mcp_read_resource(uri)
+        digest = hashlib.sha256()
+        for item in contents:
+            data = item.content
+            digest.update(data.encode() if isinstance(data, str) else data)
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+
+# Process-wide subscription manager for the server's resources
+subscriptions = SubscriptionManager()
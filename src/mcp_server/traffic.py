@@ -0,0 +1,509 @@
+"""Capture and replay of tool call traffic.
+
+With a capture path configured, a sample of tool calls is appended to a
+compact JSON-lines file, gzip-compressed if the path ends in ``.gz``. Each
+line holds a timestamp, a pseudonymous session ID, the tool name and its
+arguments. Arguments are anonymized before they are written. Calculator
+expressions keep their numbers and operators because that is what the caches
+and benchmarks need, but variable names are replaced by pseudonyms, and an
+expression containing anything else is anonymized as a whole. Every other
+string is replaced by a keyed hash of the same length, so equal values stay
+equal and sizes stay realistic, but the originals cannot be recovered.
+Sampling is per session, so a sampled session is captured completely and
+variable assignments replay correctly.
+
+Records are written by a background thread, so file and compression work
+stay off the event loop. If the writer falls behind by more than
+``CAPTURE_QUEUE_SIZE`` records, further records are dropped and counted.
+
+The same file can be used in two ways:
+
+* replayed against a server at the original pace or scaled, to benchmark
+  with a production mix::
+
+      python -m mcp_server.traffic replay capture.jsonl.gz --speed 4
+
+* loaded at startup to warm the calculator caches with the most frequent
+  expressions (``MCP_WARM_CACHE``); see :func:`warm_caches`
+"""
+
+import argparse
+import asyncio
+import contextlib
+import gzip
+import hashlib
+import json
+import logging
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import time
+import zlib
+from collections import Counter
+from collections.abc import Iterator, Sequence
+from pathlib import Path
+from typing import IO, Any, cast
+
+import mcp.types
+from fastmcp import Client, FastMCP
+from fastmcp.server.middleware import CallNext, Middleware, MiddlewareContext
+from fastmcp.tools.tool import ToolResult
+from pydantic import BaseModel, ValidationError
+
+from mcp_server.calculator import ALLOWED_CHARS, CACHE_SIZE, VARIABLE_CHARS, warm
+from mcp_server.server import ServerConfig
+from mcp_server.sessions import current_session_id
+
+logger = logging.getLogger(__name__)
+
+# Arguments kept as expressions, with only their variable names
+# pseudonymized; all other strings are hashed whole
+EXPRESSION_ARGUMENTS = {"calculate": frozenset({"expression"})}
+
+# Records waiting for the writer thread before new ones are dropped
+CAPTURE_QUEUE_SIZE = 10_000
+
+# Shortest pseudonym for a variable name, so short names do not collide
+MIN_PSEUDONYM_LENGTH = 9
+
+# Identifiers in an expression; the leading boundary skips the letters in
+# number literals such as 1e5 or 2j
+_IDENTIFIER = re.compile(r"\b[A-Za-z_]\w*")
+
+_STOP = object()
+
+
+class CapturedCall(BaseModel):
+    """A single captured tool call."""
+
+    ts: float
+    session: str | None = None
+    tool: str
+    args: dict[str, Any]
+
+
+class ReplayReport(BaseModel):
+    """Outcome of a replay run."""
+
+    calls: int
+    errors: int
+    duration: float
+    speed: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+    max_lag_ms: float
+
+
+def _open(path: Path, mode: str) -> IO[str]:
+    if path.suffix == ".gz":
+        return cast(IO[str], gzip.open(path, mode + "t", encoding="utf-8"))
+    return open(path, mode, encoding="utf-8")
+
+
+def _open_binary(path: Path) -> IO[bytes]:
+    if path.suffix == ".gz":
+        return cast(IO[bytes], gzip.open(path, "rb"))
+    return open(path, "rb")
+
+
+class TrafficRecorder:
+    """Writes a sample of tool calls to a capture file."""
+
+    def __init__(self, config: ServerConfig | None = None) -> None:
+        self._lock = threading.Lock()
+        self._queue: queue.Queue[Any] = queue.Queue(maxsize=CAPTURE_QUEUE_SIZE)
+        self._writer: threading.Thread | None = None
+        self._path: Path | None = None
+        # Pseudonyms are only stable for the lifetime of this process
+        self._key = os.urandom(16)
+        self._recorded = 0
+        self._skipped = 0
+        self._dropped = 0
+        self.configure(config or ServerConfig())
+
+    def configure(self, config: ServerConfig) -> None:
+        """Apply a configuration, opening or closing the capture file."""
+        self.sample_rate = config.capture_sample_rate
+        path = Path(config.capture_path) if config.capture_path else None
+        if path == self._path:
+            return
+        self.close()
+        if path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            capture = _open(path, "a")
+            self._writer = threading.Thread(
+                target=self._run,
+                args=(capture,),
+                name="mcp-traffic-writer",
+                daemon=True,
+            )
+            self._writer.start()
+            logger.info("Capturing tool calls to %s", path)
+        self._path = path
+
+    @property
+    def enabled(self) -> bool:
+        """Whether calls are being captured."""
+        return self._writer is not None
+
+    def record(self, tool: str, args: dict[str, Any], session: str | None) -> None:
+        """
+        Capture a call if its session is sampled.
+
+        Args:
+            tool: The name of the called tool
+            args: The call's arguments, anonymized before writing
+            session: The caller's session ID, if any
+        """
+        if self._writer is None:
+            return
+        if not self._sampled(session):
+            self._skipped += 1
+            return
+        expressions = EXPRESSION_ARGUMENTS.get(tool, frozenset())
+        call = CapturedCall(
+            ts=round(time.time(), 3),
+            session=None if session is None else self._hash(session, 16),
+            tool=tool,
+            args={
+                name: (
+                    self._anonymize_expression(value)
+                    if name in expressions and isinstance(value, str)
+                    else self._anonymize(value)
+                )
+                for name, value in args.items()
+            },
+        )
+        try:
+            self._queue.put_nowait(call.model_dump_json(exclude_none=True) + "\n")
+        except queue.Full:
+            with self._lock:
+                self._dropped += 1
+
+    def close(self) -> None:
+        """Write out queued records and close the capture file."""
+        writer = self._writer
+        if writer is not None:
+            self._queue.put(_STOP)
+            writer.join()
+            self._writer = None
+        self._path = None
+
+    def stats(self) -> dict[str, Any]:
+        """Return capture counters."""
+        with self._lock:
+            return {
+                "path": None if self._path is None else str(self._path),
+                "recorded": self._recorded,
+                "skipped": self._skipped,
+                "dropped": self._dropped,
+            }
+
+    def attach(self, server: FastMCP) -> None:
+        """
+        Capture the tool calls made to ``server``.
+
+        Attach before other middleware that answers calls itself, such as
+        the gateway, so that those calls are captured too.
+        """
+        server.add_middleware(_CaptureMiddleware(self))
+
+    def _run(self, capture: IO[str]) -> None:
+        """Write queued lines in batches until asked to stop."""
+        try:
+            while True:
+                batch = [self._queue.get()]
+                with contextlib.suppress(queue.Empty):
+                    while len(batch) < CAPTURE_QUEUE_SIZE:
+                        batch.append(self._queue.get_nowait())
+                stop = any(line is _STOP for line in batch)
+                lines = [line for line in batch if line is not _STOP]
+                capture.write("".join(lines))
+                with self._lock:
+                    self._recorded += len(lines)
+                if stop:
+                    return
+        except Exception:
+            logger.exception("Traffic capture writer failed; capture stopped")
+            self._writer = None
+        finally:
+            capture.close()
+
+    def _sampled(self, session: str | None) -> bool:
+        if self.sample_rate >= 1:
+            return True
+        if session is None:
+            return random.random() < self.sample_rate
+        digest = hashlib.blake2b(session.encode(), key=self._key, digest_size=8)
+        return int.from_bytes(digest.digest(), "big") < self.sample_rate * 2**64
+
+    def _hash(self, value: str, length: int) -> str:
+        digest = hashlib.blake2b(value.encode(), key=self._key).hexdigest()
+        return (digest * (length // len(digest) + 1))[:length]
+
+    def _anonymize_expression(self, expression: str) -> str:
+        """Pseudonymize variable names, keeping numbers and operators."""
+        if not set(expression) <= VARIABLE_CHARS:
+            return self._hash(expression, len(expression))
+        return _IDENTIFIER.sub(lambda match: self._pseudonym(match[0]), expression)
+
+    def _pseudonym(self, name: str) -> str:
+        # Starts with a letter so it is still a valid variable name
+        length = max(len(name), MIN_PSEUDONYM_LENGTH)
+        return "v" + self._hash(name, length - 1)
+
+    def _anonymize(self, value: Any) -> Any:
+        if isinstance(value, str):
+            return self._hash(value, len(value))
+        if isinstance(value, dict):
+            return {key: self._anonymize(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self._anonymize(item) for item in value]
+        return value
+
+
+class _CaptureMiddleware(Middleware):
+    """Hands every tool call to the recorder before it runs."""
+
+    def __init__(self, recorder: TrafficRecorder) -> None:
+        self.recorder = recorder
+
+    async def on_call_tool(
+        self,
+        context: MiddlewareContext[mcp.types.CallToolRequestParams],
+        call_next: CallNext[mcp.types.CallToolRequestParams, ToolResult],
+    ) -> ToolResult:
+        if self.recorder.enabled:
+            self.recorder.record(
+                context.message.name,
+                context.message.arguments or {},
+                current_session_id(),
+            )
+        return await call_next(context)
+
+
+def read_capture(path: str | Path) -> Iterator[CapturedCall]:
+    """
+    Read the calls of a capture file in order.
+
+    Lines that cannot be parsed, such as one cut short when the capturing
+    process was killed, are skipped. A compressed file that turns out to be
+    corrupt or truncated ends the calls read from it.
+
+    Raises:
+        OSError: If the file cannot be opened
+    """
+    path = Path(path)
+    with _open_binary(path) as capture:
+        try:
+            for line in capture:
+                if not line.strip():
+                    continue
+                try:
+                    yield CapturedCall.model_validate_json(line)
+                except ValidationError:
+                    logger.debug("Skipping unreadable line in %s", path)
+        except (EOFError, zlib.error, gzip.BadGzipFile) as e:
+            logger.warning("Capture file %s is corrupt or truncated: %s", path, e)
+
+
+def warm_caches(path: str | Path, limit: int = CACHE_SIZE) -> int:
+    """
+    Fill the calculator caches with the most frequent captured expressions.
+
+    Only expressions without variables are warmed. Variable names in a
+    capture are pseudonyms that live traffic never uses, so statements with
+    names would only take up cache slots. The most frequent expressions are
+    warmed last, so they are the last to be evicted.
+
+    Args:
+        path: A capture file
+        limit: Most distinct expressions to warm
+
+    Returns:
+        The number of expressions now cached
+    """
+    counts: Counter[str] = Counter()
+    for call in read_capture(path):
+        expression = call.args.get("expression")
+        if (
+            call.tool == "calculate"
+            and isinstance(expression, str)
+            and ALLOWED_CHARS.issuperset(expression)
+        ):
+            counts[expression] += 1
+    return sum(
+        warm(expression) for expression, _ in reversed(counts.most_common(limit))
+    )
+
+
+async def _close_client(client: Client[Any] | None) -> None:
+    if client is not None:
+        with contextlib.suppress(Exception):
+            await client.close()
+
+
+def _percentile(ordered: Sequence[float], q: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def replay(
+    calls: Sequence[CapturedCall],
+    target: Any = None,
+    *,
+    speed: float = 1.0,
+    max_in_flight: int = 256,
+) -> ReplayReport:
+    """
+    Re-send captured calls to a server, keeping their relative timing.
+
+    Calls of one captured session are sent in order over one client session,
+    so variables assigned earlier are available to later calls.
+
+    Args:
+        calls: The calls to send, in capture order
+        target: Anything :class:`fastmcp.Client` accepts, e.g. a URL; defaults
+            to this package's server, in-process
+        speed: Pace relative to the capture; 2 sends twice as fast and 0 as
+            fast as possible
+        max_in_flight: Most calls outstanding at once
+
+    Returns:
+        Latency percentiles, error count and how far sending fell behind
+    """
+    if target is None:
+        from mcp_server.main import mcp
+
+        target = mcp
+    last_call = {call.session: i for i, call in enumerate(calls)}
+    clients: dict[str | None, Client[Any]] = {}
+    locks: dict[str | None, asyncio.Lock] = {}
+    slots = asyncio.Semaphore(max_in_flight)
+    latencies: list[float] = []
+    errors = 0
+    max_lag = 0.0
+
+    async def connect(session: str | None) -> Client[Any]:
+        client = clients.get(session)
+        if client is None:
+            client = Client(target)
+            await client.__aenter__()
+            clients[session] = client
+        return client
+
+    async def send(index: int, call: CapturedCall, lock: asyncio.Lock) -> None:
+        nonlocal errors
+        try:
+            async with lock:
+                try:
+                    client = await connect(call.session)
+                except Exception as e:
+                    logger.warning("Cannot connect to %s: %s", target, e)
+                    errors += 1
+                else:
+                    sent = time.perf_counter()
+                    try:
+                        result = await client.call_tool_mcp(call.tool, call.args)
+                        errors += result.isError
+                    except Exception as e:
+                        logger.debug("Replayed call to %s failed: %s", call.tool, e)
+                        errors += 1
+                    latencies.append((time.perf_counter() - sent) * 1000)
+                if last_call[call.session] == index:
+                    del locks[call.session]
+                    await _close_client(clients.pop(call.session, None))
+        finally:
+            slots.release()
+
+    tasks = []
+    started = time.perf_counter()
+    origin = calls[0].ts if calls else 0.0
+    try:
+        for index, call in enumerate(calls):
+            due = (call.ts - origin) / speed if speed > 0 else 0.0
+            delay = due - (time.perf_counter() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await slots.acquire()
+            if speed > 0:
+                max_lag = max(max_lag, time.perf_counter() - started - due)
+            lock = locks.setdefault(call.session, asyncio.Lock())
+            tasks.append(asyncio.create_task(send(index, call, lock)))
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for client in list(clients.values()):
+            await _close_client(client)
+        clients.clear()
+
+    ordered = sorted(latencies)
+    return ReplayReport(
+        calls=len(calls),
+        errors=errors,
+        duration=time.perf_counter() - started,
+        speed=speed,
+        p50_ms=_percentile(ordered, 0.50),
+        p95_ms=_percentile(ordered, 0.95),
+        p99_ms=_percentile(ordered, 0.99),
+        max_ms=ordered[-1] if ordered else 0.0,
+        max_lag_ms=max_lag * 1000,
+    )
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Command line entry point; returns the process exit code."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    replay_parser = commands.add_parser("replay", help="re-send a capture file")
+    replay_parser.add_argument("capture")
+    replay_parser.add_argument(
+        "--target", help="server URL or script (default: this server, in-process)"
+    )
+    replay_parser.add_argument("--speed", type=float, default=1.0)
+    replay_parser.add_argument("--limit", type=int, default=None)
+    replay_parser.add_argument("--max-in-flight", type=int, default=256)
+    replay_parser.add_argument(
+        "--json", action="store_true", help="print the full report"
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+
+    calls = list(read_capture(args.capture))[: args.limit]
+    report = asyncio.run(
+        replay(
+            calls,
+            args.target,
+            speed=args.speed,
+            max_in_flight=args.max_in_flight,
+        )
+    )
+    if args.json:
+        print(json.dumps(report.model_dump(), indent=2))
+    else:
+        print(
+            f"{report.calls} calls in {report.duration:.1f}s "
+            f"({report.errors} errors): p50 {report.p50_ms:.1f}ms, "
+            f"p95 {report.p95_ms:.1f}ms, p99 {report.p99_ms:.1f}ms, "
+            f"max {report.max_ms:.1f}ms; fell behind by up to "
+            f"{report.max_lag_ms:.0f}ms"
+        )
+    return 0 if report.errors == 0 else 1
+
+
+# Process-wide recorder, configured from ServerConfig by mcp_server.main
+traffic = TrafficRecorder()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
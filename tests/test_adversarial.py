@@ -0,0 +1,252 @@
+"""Worst-case latency and memory tests for the calculate tool.
+
+Every input here passes the ``allowed_chars`` filter, so it reaches the
+parser and evaluator. Each one must produce a result or an error within a
+fixed time and memory budget. A hang aborts the whole run after
+``HARD_TIMEOUT`` seconds rather than blocking CI forever. The calculator's
+caches are disabled, so every measurement covers a full evaluation.
+"""
+
+import faulthandler
+import random
+import time
+import tracemalloc
+
+import pytest
+
+from mcp_server.calculator import (
+    ALLOWED_CHARS,
+    CACHE_SIZE,
+    MAX_EXPRESSION_LENGTH,
+    MAX_NAME_LENGTH,
+    VARIABLE_CHARS,
+    cache_stats,
+    configure_caches,
+)
+from mcp_server.main import _calculate as calculate
+from mcp_server.sessions import sessions
+
+LATENCY_BUDGET = 0.25  # seconds per input
+MEMORY_BUDGET = 8 * 1024 * 1024  # peak bytes allocated per input
+OUTPUT_BUDGET = 16 * 1024  # characters in the returned message
+HARD_TIMEOUT = 30  # seconds before a hung input aborts the test run
+
+RANDOM_SEED = 20240601
+RANDOM_CASES = 500
+
+
+SESSION = "adversarial"
+
+
+@pytest.fixture(autouse=True)
+def uncached():
+    """Measure evaluation rather than cache lookups."""
+    configure_caches(0)
+    yield
+    configure_caches(CACHE_SIZE)
+
+
+def measure(expression: str, session_id: str | None = None) -> tuple[str, float, int]:
+    """Return the result, wall time and peak allocation of one calculation."""
+    faulthandler.dump_traceback_later(HARD_TIMEOUT, exit=True)
+    try:
+        start = time.perf_counter()
+        result = calculate(expression, session_id)
+        elapsed = time.perf_counter() - start
+
+        tracemalloc.start()
+        try:
+            calculate(expression, session_id)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    finally:
+        faulthandler.cancel_dump_traceback_later()
+    stats = cache_stats()
+    assert stats["results"]["hits"] == stats["statements"]["hits"] == 0
+    return result, elapsed, peak
+
+
+def assert_within_budget(expression: str, session_id: str | None = None) -> None:
+    """Assert that an input is answered cheaply and in the expected form."""
+    result, elapsed, peak = measure(expression, session_id)
+    shown = expression if len(expression) <= 60 else f"{expression[:60]}..."
+
+    assert result.startswith(("The result of", "Error")), shown
+    assert elapsed < LATENCY_BUDGET, f"{shown!r} took {elapsed:.3f}s"
+    assert peak < MEMORY_BUDGET, f"{shown!r} allocated {peak} bytes"
+    assert len(result) < OUTPUT_BUDGET, f"{shown!r} returned {len(result)} chars"
+
+
+def adversarial_corpus() -> list:
+    """Build hand-picked worst cases for the parser and evaluator."""
+    cases = []
+
+    for depth in (10, 63, 64, 65, 199, 200, 201, 1000, 100_000):
+        cases.append(
+            pytest.param("(" * depth + "1" + ")" * depth, id=f"parens-{depth}")
+        )
+    cases.append(pytest.param("(" * 100_000, id="unbalanced-parens"))
+
+    for length in (4300, MAX_EXPRESSION_LENGTH, 1_000_000):
+        cases.append(pytest.param("9" * length, id=f"digits-{length}"))
+        cases.append(pytest.param("9" * length + ".5", id=f"float-digits-{length}"))
+        cases.append(pytest.param("0." + "9" * length, id=f"fraction-{length}"))
+    cases.append(pytest.param("1" * 309 + ".0 * 10", id="float-overflow"))
+
+    for length in (1000, 2000, 4000):
+        cases.append(pytest.param("-" * length + "1", id=f"unary-chain-{length}"))
+        terms = length // 2
+        cases.append(pytest.param("1+" * terms + "1", id=f"sum-chain-{terms}"))
+        cases.append(pytest.param("2**" * terms + "2", id=f"pow-chain-{terms}"))
+
+    towers = [
+        "9**9**9",
+        "9**9**9**9",
+        "2**2**2**2**2",
+        "2**2**2**2**2**2",
+        "-9**9**9",
+        "(-9)**9**9",
+        "9.0**9**9",
+        "9**9.0**9",
+        "(2**64)**(2**64)",
+        "10**10**10",
+        "2**-9**9",
+        "2**-(10**3000)",
+        "(10**3000)**0.5",
+        "1.0000001**(10**300)",
+    ]
+    cases.extend(pytest.param(tower, id=f"tower-{tower}") for tower in towers)
+
+    conversions = [
+        "(10**3000) / 3",
+        "(10**3000) + 0.5",
+        "(10**3000) // 7",
+        "(10**3000) * (10**3000)",
+        "(10**1000) * (10**1000) * (10**1000) * (10**1000)",
+        "(2**9999) - 1",
+        "(2**9999) * 2 * 2",
+        "(-8) ** 0.5",
+        "1/3" * 1000,
+    ]
+    cases.extend(pytest.param(c, id=f"convert-{c[:30]}") for c in conversions)
+
+    return cases
+
+
+def random_number(rng: random.Random) -> str:
+    """Return a random numeric literal, occasionally a very long one."""
+    digits = rng.choice([1, 1, 2, 3, 10, 100, 400])
+    number = "".join(rng.choice("0123456789") for _ in range(digits)).lstrip("0")
+    number = number or "0"
+    if rng.random() < 0.2:
+        number += "." + str(rng.randrange(1000))
+    return number
+
+
+def random_expression(rng: random.Random, depth: int) -> str:
+    """Return a random, usually well-formed, arithmetic expression."""
+    if depth <= 0 or rng.random() < 0.25:
+        return random_number(rng)
+    choice = rng.random()
+    if choice < 0.15:
+        return f"({random_expression(rng, depth - 1)})"
+    if choice < 0.25:
+        return "-" + random_expression(rng, depth - 1)
+    op = rng.choice(["+", "-", "*", "/", "//", "**", "**", "**"])
+    left = random_expression(rng, depth - 1)
+    right = random_expression(rng, depth - 1)
+    return f"{left} {op} {right}"
+
+
+def random_noise(rng: random.Random) -> str:
+    """Return a random string over the allowed alphabet."""
+    alphabet = sorted(ALLOWED_CHARS)
+    length = rng.choice([1, 10, 100, 1000, MAX_EXPRESSION_LENGTH])
+    return "".join(rng.choice(alphabet) for _ in range(length))
+
+
+class TestAdversarialCorpus:
+    """Hand-picked worst cases must stay within the latency and memory budget."""
+
+    @pytest.mark.parametrize("expression", adversarial_corpus())
+    def test_within_budget(self, expression):
+        """Test that a worst-case input is answered within budget."""
+        assert all(c in ALLOWED_CHARS for c in expression)
+        assert_within_budget(expression)
+
+    def test_exponent_tower_is_rejected(self):
+        """Test that the classic exponent tower is refused, not computed."""
+        result = calculate("9**9**9")
+        assert result.startswith("Error calculating")
+        assert "too large" in result
+
+    def test_oversized_input_is_not_echoed(self):
+        """Test that megabyte inputs are rejected without echoing them back."""
+        result = calculate("9" * 1_000_000)
+        assert result.startswith("Error: Expression is too long")
+        assert len(result) < 100
+
+    def test_shared_invalid_expressions(self, invalid_expressions):
+        """Test that the shared invalid expressions also stay within budget."""
+        for expression in invalid_expressions:
+            assert_within_budget(expression)
+
+
+class TestAdversarialProperties:
+    """Randomly generated inputs must stay within the same budget."""
+
+    def test_random_expressions_within_budget(self):
+        """Test random expression trees mixing huge literals and towers."""
+        rng = random.Random(RANDOM_SEED)
+        for _ in range(RANDOM_CASES):
+            expression = random_expression(rng, depth=rng.randrange(1, 8))
+            if len(expression) > MAX_EXPRESSION_LENGTH:
+                expression = expression[:MAX_EXPRESSION_LENGTH]
+            assert_within_budget(expression)
+
+    def test_random_noise_within_budget(self):
+        """Test random strings over the allowed alphabet."""
+        rng = random.Random(RANDOM_SEED + 1)
+        for _ in range(RANDOM_CASES):
+            assert_within_budget(random_noise(rng))
+
+
+def variable_corpus() -> list:
+    """Build worst cases for statements that read and assign variables."""
+    long_name = "v" * MAX_NAME_LENGTH
+    statements = [
+        "big * big",
+        "big ** big",
+        "big ** 2",
+        "huge = big * big",
+        "tower = 9 ** 9 ** 9",
+        "big = big",
+        f"{long_name} = big",
+        f"{long_name}x = 1",
+        "x = " + " + ".join(["big"] * 400),
+        "x = " + "-" * 2000 + "big",
+        "(" * 1000 + "big" + ")" * 1000,
+        "a" * MAX_EXPRESSION_LENGTH,
+        "x = " * 1000 + "1",
+        "x == 1",
+        "=" * 100,
+    ]
+    return [pytest.param(s, id=f"variables-{s[:30]}") for s in statements]
+
+
+class TestAdversarialVariables:
+    """Statements using session variables must stay within the same budget."""
+
+    def setup_method(self):
+        sessions.clear(SESSION)
+        calculate("big = 2 ** 9999", SESSION)
+
+    def teardown_method(self):
+        sessions.clear(SESSION)
+
+    @pytest.mark.parametrize("statement", variable_corpus())
+    def test_within_budget(self, statement):
+        """Test that a worst-case statement is answered within budget."""
+        assert all(c in VARIABLE_CHARS for c in statement)
+        assert_within_budget(statement, SESSION)
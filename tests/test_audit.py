@@ -0,0 +1,291 @@
+"""Test cases for the tool invocation audit log."""
+
+import asyncio
+import inspect
+import queue
+import threading
+import time
+
+import pytest
+from fastmcp import Client
+
+from mcp_server import audit
+from mcp_server.audit import AuditLog, AuditRecord, audit_log, audited
+from mcp_server.main import mcp
+from mcp_server.server import ServerConfig
+
+
+def make_record(tool: str = "calculate", ts: float | None = None) -> AuditRecord:
+    return AuditRecord(
+        ts=time.time() if ts is None else ts,
+        tool=tool,
+        session="s1",
+        args={"expression": "1 + 1"},
+        result="The result of '1 + 1' is 2",
+        latency_ms=0.5,
+    )
+
+
+@pytest.fixture
+def audit_config(tmp_path):
+    """Provide a configuration that writes the audit log to a temp dir."""
+    config = ServerConfig()
+    config.audit_log_path = str(tmp_path / "audit.jsonl")
+    config.audit_flush_interval = 0.05
+    return config
+
+
+@pytest.fixture
+def log(audit_config):
+    """Provide a running audit log that is closed after the test."""
+    audit = AuditLog(audit_config)
+    yield audit
+    audit.close()
+
+
+@pytest.fixture
+def global_audit_log(audit_config):
+    """Enable the process-wide audit log for the duration of a test."""
+    audit_log.configure(audit_config)
+    yield audit_log
+    audit_log.configure(ServerConfig())
+
+
+class TestAuditLog:
+    """Test cases for AuditLog."""
+
+    def test_disabled_without_path(self):
+        """Test that the log is a no-op when no path is configured."""
+        audit = AuditLog()
+
+        assert not audit.enabled
+        assert audit.record(make_record()) is False
+        assert audit.query() == []
+
+    def test_invalid_overflow_policy(self):
+        """Test that unknown overflow policies are rejected."""
+        config = ServerConfig()
+        config.audit_overflow_policy = "spill"
+
+        with pytest.raises(ValueError, match="overflow policy"):
+            AuditLog(config)
+
+    def test_records_are_written_and_queried(self, log, audit_config):
+        """Test that queued records are persisted as JSON lines."""
+        for _ in range(3):
+            assert log.record(make_record())
+
+        entries = log.query()
+
+        assert len(entries) == 3
+        assert entries[0].args == {"expression": "1 + 1"}
+        with open(audit_config.audit_log_path, encoding="utf-8") as stream:
+            assert len(stream.readlines()) == 3
+
+    def test_flush_batches_fsync(self, log):
+        """Test that a burst of records is synced as one group."""
+        for _ in range(100):
+            log.record(make_record())
+        log.flush()
+
+        stats = log.stats()
+        assert stats["written"] == 100
+        assert stats["syncs"] < 100
+
+    def test_writer_syncs_after_interval(self, log, audit_config):
+        """Test that records reach disk without an explicit flush."""
+        log.record(make_record())
+        time.sleep(audit_config.audit_flush_interval * 5)
+
+        assert log.stats()["syncs"] == 1
+
+    def test_query_filters_by_time_and_tool(self, log):
+        """Test filtering by time range and tool name."""
+        log.record(make_record(ts=100.0))
+        log.record(make_record(ts=200.0))
+        log.record(make_record(tool="greet", ts=300.0))
+
+        assert [e.ts for e in log.query(until=250.0)] == [100.0, 200.0]
+        assert [e.ts for e in log.query(tool="greet")] == [300.0]
+
+    def test_query_limit_keeps_most_recent(self, log):
+        """Test that the limit keeps the newest records."""
+        for ts in range(10):
+            log.record(make_record(ts=float(ts)))
+
+        assert [e.ts for e in log.query(limit=3)] == [7.0, 8.0, 9.0]
+
+    def test_rotation_keeps_backups(self, audit_config, tmp_path):
+        """Test that files rotate by size and stay queryable."""
+        audit_config.audit_max_bytes = 200
+        audit_config.audit_backup_count = 2
+        audit = AuditLog(audit_config)
+        try:
+            for ts in range(6):
+                audit.record(make_record(ts=float(ts)))
+                audit.flush()
+            entries = audit.query()
+        finally:
+            audit.close()
+
+        assert (tmp_path / "audit.jsonl.1").exists()
+        assert (tmp_path / "audit.jsonl.2").exists()
+        assert not (tmp_path / "audit.jsonl.3").exists()
+        assert [e.ts for e in entries] == sorted(e.ts for e in entries)
+        assert entries[-1].ts == 5.0
+
+    def test_drop_policy_counts_dropped_records(self):
+        """Test that a full queue drops records under the drop policy."""
+        audit = AuditLog()
+        audit._queue = queue.Queue(maxsize=1)
+        audit._writer = threading.Thread(target=lambda: None)
+
+        assert audit.record(make_record()) is True
+        assert audit.record(make_record()) is False
+        assert audit.stats()["dropped"] == 1
+
+    def test_query_reads_lines_across_blocks(self, log, monkeypatch):
+        """Test that scanning backwards joins lines split between blocks."""
+        monkeypatch.setattr(audit, "_READ_BLOCK", 7)
+        for ts in range(20):
+            log.record(make_record(ts=float(ts)))
+
+        assert [e.ts for e in log.query()] == [float(ts) for ts in range(20)]
+        assert [e.ts for e in log.query(since=15.0, limit=2)] == [18.0, 19.0]
+
+    def test_truncated_tail_is_skipped(self, audit_config):
+        """Test that a record cut short by a crash does not break queries."""
+        audit = AuditLog(audit_config)
+        audit.record(make_record(ts=1.0))
+        audit.close()
+        with open(audit_config.audit_log_path, "ab") as stream:
+            stream.write(b'{"ts": 2.0, "tool": "calc')
+
+        audit = AuditLog(audit_config)
+        try:
+            assert [e.ts for e in audit.query()] == [1.0]
+            audit.record(make_record(ts=3.0))
+            assert [e.ts for e in audit.query()] == [1.0, 3.0]
+        finally:
+            audit.close()
+
+    def test_failed_writer_disables_log(self, tmp_path):
+        """Test that a writer that cannot open its file leaves nobody waiting."""
+        config = ServerConfig()
+        config.audit_log_path = str(tmp_path)
+        config.audit_overflow_policy = "block"
+        config.audit_queue_size = 1
+        audit = AuditLog(config)
+        audit._writer.join(timeout=5.0)
+
+        start = time.perf_counter()
+        assert not audit.enabled
+        assert audit.record(make_record()) is False
+        assert audit.flush() is False
+        assert audit.query() == []
+        audit.close()
+
+        assert time.perf_counter() - start < 1.0
+        assert audit.stats()["failed"]
+
+    def test_block_policy_waits_off_the_event_loop(self, audit_config):
+        """Test that a blocked async handler does not stall other tasks."""
+        audit_config.audit_overflow_policy = "block"
+        audit_config.audit_queue_size = 1
+        audit_log.configure(audit_config)
+        release, finished = threading.Event(), threading.Event()
+        original = audit_log._queue.put
+
+        def slow_put(item, *args, **kwargs):
+            release.wait(timeout=2.0)
+            original(item, *args, **kwargs)
+            finished.set()
+
+        audit_log._queue.put = slow_put
+
+        @audited
+        async def handler() -> str:
+            return "ok"
+
+        async def scenario() -> list[str]:
+            order: list[str] = []
+            call = asyncio.create_task(handler())
+            await asyncio.sleep(0.05)
+            if not finished.is_set():
+                order.append("loop free")
+            release.set()
+            order.append(await call)
+            return order
+
+        try:
+            assert asyncio.run(scenario()) == ["loop free", "ok"]
+        finally:
+            release.set()
+            audit_log.configure(ServerConfig())
+
+    def test_close_writes_pending_records(self, audit_config):
+        """Test that closing the log writes out queued records."""
+        audit = AuditLog(audit_config)
+        audit.record(make_record())
+        audit.close()
+
+        with open(audit_config.audit_log_path, encoding="utf-8") as stream:
+            assert len(stream.readlines()) == 1
+
+
+@pytest.mark.asyncio
+class TestAudited:
+    """Test cases for the audited decorator."""
+
+    async def test_audited_sync_function(self, global_audit_log):
+        """Test that sync handler calls are recorded."""
+
+        @audited
+        def double(value: int) -> int:
+            return value * 2
+
+        assert double(4) == 8
+        [entry] = global_audit_log.query(tool="double")
+        assert entry.args == {"value": 4}
+        assert entry.result == 8
+        assert entry.error is None
+
+    async def test_audited_async_function_records_errors(self, global_audit_log):
+        """Test that async handler failures are recorded and re-raised."""
+
+        @audited
+        async def explode(reason: str) -> str:
+            raise RuntimeError(reason)
+
+        with pytest.raises(RuntimeError):
+            await explode(reason="boom")
+        [entry] = global_audit_log.query(tool="explode")
+        assert entry.error == "boom"
+
+    async def test_audited_preserves_signature(self):
+        """Test that the wrapper keeps the handler signature."""
+
+        async def handler(name: str, count: int = 1) -> str:
+            return name * count
+
+        assert inspect.signature(audited(handler)) == inspect.signature(handler)
+
+
+@pytest.mark.asyncio
+class TestAuditIntegration:
+    """Test auditing through the MCP server."""
+
+    async def test_tool_calls_are_audited_with_session(self, global_audit_log):
+        """Test that calculate and greet calls can be read back via audit_query."""
+        async with Client(mcp) as client:
+            await client.call_tool("calculate", {"expression": "2 + 2"})
+            await client.call_tool("greet", {"name": "Audit"})
+            result = await client.call_tool("audit_query", {"limit": 10})
+
+        entries = result.structured_content["result"]
+        assert [e["tool"] for e in entries] == ["calculate", "greet"]
+        assert entries[0]["args"] == {"expression": "2 + 2"}
+        assert entries[0]["result"] == "The result of '2 + 2' is 4"
+        assert entries[0]["session"]
+        assert entries[0]["session"] == entries[1]["session"]
+        assert entries[0]["latency_ms"] >= 0
@@ -0,0 +1,225 @@
+"""Test cases for the bounded arithmetic evaluator."""
+
+import pytest
+
+from mcp_server.calculator import (
+    CACHE_SIZE,
+    MAX_CACHED_LENGTH,
+    MAX_DEPTH,
+    MAX_EXPRESSION_LENGTH,
+    MAX_INT_BITS,
+    MAX_NAME_LENGTH,
+    CalculationError,
+    cache_stats,
+    configure_caches,
+    evaluate,
+    execute,
+    parse,
+    parse_statement,
+    warm,
+)
+
+
+class TestEvaluate:
+    """Test cases for evaluate."""
+
+    @pytest.mark.parametrize(
+        "expression,expected",
+        [
+            ("2 + 2", 4),
+            ("10 - 5", 5),
+            ("3 * 4", 12),
+            ("15 / 3", 5.0),
+            ("7 // 2", 3),
+            ("2 ** 10", 1024),
+            ("2 ** -1", 0.5),
+            ("-(3 + 4)", -7),
+            ("+5", 5),
+            ("(2 + 3) * 4", 20),
+            ("2 ** 3 ** 2", 512),
+            ("10.5 + 2.3", 10.5 + 2.3),
+        ],
+    )
+    def test_matches_python_arithmetic(self, expression, expected):
+        """Test that results match Python's own arithmetic."""
+        assert evaluate(expression) == expected
+
+    def test_sample_expressions(self, sample_expressions):
+        """Test the shared sample expressions."""
+        for expression, expected in sample_expressions:
+            assert evaluate(expression) == pytest.approx(expected)
+
+    def test_division_by_zero(self):
+        """Test that division by zero raises ZeroDivisionError."""
+        with pytest.raises(ZeroDivisionError):
+            evaluate("5 / 0")
+
+    def test_syntax_error(self):
+        """Test that malformed expressions raise SyntaxError."""
+        with pytest.raises(SyntaxError):
+            evaluate("2 + * 3")
+
+    @pytest.mark.parametrize(
+        "expression",
+        ["__import__('os')", "abc", "[1, 2]", "(1, 2)", "1 if 1 else 2", "True"],
+    )
+    def test_non_arithmetic_syntax_rejected(self, expression):
+        """Test that anything but numbers and operators is rejected."""
+        with pytest.raises(CalculationError):
+            evaluate(expression)
+
+    def test_modulo_rejected(self):
+        """Test that operators outside the supported set are rejected."""
+        with pytest.raises(CalculationError, match="Unsupported operator"):
+            evaluate("7 % 2")
+
+
+class TestExecute:
+    """Test cases for execute with variables."""
+
+    def test_assignment_returns_name_and_value(self):
+        """Test that an assignment reports the name it assigns."""
+        assert execute("x = 3 * 7", {}) == ("x", 21)
+
+    def test_expression_uses_variables(self):
+        """Test that bare expressions read the given variables."""
+        assert execute("x / 2 + y", {"x": 21, "y": 1}) == (None, 11.5)
+
+    def test_unknown_variable(self):
+        """Test that an unassigned name is reported by name."""
+        with pytest.raises(CalculationError, match="Unknown variable 'z'"):
+            execute("z + 1", {})
+
+    @pytest.mark.parametrize(
+        "statement",
+        ["x = y = 1", "x += 1", "x = 1; y = 2", "x.y = 1", "x: int = 1", ""],
+    )
+    def test_only_single_assignments(self, statement):
+        """Test that only a single plain assignment is accepted."""
+        with pytest.raises((CalculationError, SyntaxError)):
+            parse_statement(statement)
+
+    def test_name_length_limit(self):
+        """Test that over-long variable names are rejected."""
+        with pytest.raises(CalculationError, match="name is too long"):
+            parse_statement("x" * (MAX_NAME_LENGTH + 1) + " = 1")
+
+    def test_variables_respect_size_limits(self):
+        """Test that cost limits also apply to values read from variables."""
+        with pytest.raises(CalculationError, match="too large"):
+            execute("x ** x", {"x": 9**9})
+
+    def test_evaluate_still_rejects_names(self):
+        """Test that evaluate without variables does not accept names."""
+        with pytest.raises(CalculationError, match="Unsupported syntax"):
+            evaluate("x + 1")
+
+
+class TestLimits:
+    """Test cases for the evaluator's cost limits."""
+
+    def test_expression_length_limit(self):
+        """Test that over-long expressions are rejected before parsing."""
+        with pytest.raises(CalculationError, match="too long"):
+            parse("1" * (MAX_EXPRESSION_LENGTH + 1))
+
+    def test_depth_limit(self):
+        """Test that deeply nested expressions are rejected."""
+        depth = MAX_DEPTH + 1
+        with pytest.raises(CalculationError, match="nested"):
+            parse("1+(" * depth + "1" + ")" * depth)
+        with pytest.raises(CalculationError, match="nested"):
+            parse("-" * depth + "1")
+
+    def test_long_flat_chain_allowed(self):
+        """Test that operator chains are not mistaken for nesting."""
+        assert evaluate("+".join(["1"] * 1000)) == 1000
+        assert evaluate(" * ".join(["2"] * 100)) == 2**100
+        assert evaluate("1" + "-1" * 1500) == -1499
+
+    def test_exponent_tower_rejected(self):
+        """Test that exponent towers are rejected instead of computed."""
+        with pytest.raises(CalculationError, match="too large"):
+            evaluate("9 ** 9 ** 9")
+
+    def test_huge_exponent_rejected(self):
+        """Test that exponents too large to estimate are rejected."""
+        with pytest.raises(CalculationError, match="Exponent is too large"):
+            evaluate("2 ** (10 ** 100)")
+
+    def test_power_at_limit_allowed(self):
+        """Test that a power just within the limit is computed."""
+        assert evaluate(f"2 ** {MAX_INT_BITS - 1}") == 2 ** (MAX_INT_BITS - 1)
+
+    def test_product_over_limit_rejected(self):
+        """Test that products exceeding the bit limit are rejected."""
+        half = MAX_INT_BITS // 2 + 1
+        with pytest.raises(CalculationError, match="too large"):
+            evaluate(f"(2 ** {half}) * (2 ** {half})")
+
+    def test_trivial_powers_of_huge_exponent(self):
+        """Test that powers of 0, 1 and -1 stay cheap and allowed."""
+        assert evaluate("1 ** 999999999") == 1
+        assert evaluate("0 ** 999999999") == 0
+        assert evaluate("(-1) ** 999999999") == -1
+
+
+class TestCaches:
+    """Test cases for the statement and result caches."""
+
+    def setup_method(self):
+        configure_caches(8)
+
+    def teardown_method(self):
+        configure_caches(CACHE_SIZE)
+
+    def test_repeated_expression_hits_result_cache(self):
+        """Test that a repeated expression is answered from the cache."""
+        assert evaluate("6 * 7") == 42
+        assert evaluate("6 * 7") == 42
+
+        results = cache_stats()["results"]
+        assert (results["hits"], results["misses"]) == (1, 1)
+
+    def test_statement_cache_is_independent_of_variables(self):
+        """Test that cached statements are re-evaluated with current values."""
+        assert execute("x * 2", {"x": 1}) == (None, 2)
+        assert execute("x * 2", {"x": 5}) == (None, 10)
+
+        assert cache_stats()["statements"]["hits"] == 1
+
+    def test_numeric_statements_use_result_cache(self):
+        """Test that execute shares results with evaluate when no names occur."""
+        evaluate("1 + 2")
+        assert execute("1 + 2", {}) == (None, 3)
+
+        assert cache_stats()["results"]["hits"] == 1
+
+    def test_long_inputs_not_cached(self):
+        """Test that inputs over the length limit bypass the caches."""
+        expression = "1" * MAX_CACHED_LENGTH + " + 1"
+
+        evaluate(expression)
+
+        assert cache_stats()["results"]["currsize"] == 0
+        assert not warm(expression)
+
+    def test_errors_not_cached(self):
+        """Test that failing expressions are not remembered."""
+        with pytest.raises(ZeroDivisionError):
+            evaluate("1 / 0")
+
+        assert cache_stats()["results"]["currsize"] == 0
+        assert not warm("1 / 0")
+
+    def test_warm(self):
+        """Test that warming makes the next calculation a cache hit."""
+        assert warm("2 ** 8")
+        assert warm("y = 2")
+
+        evaluate("2 ** 8")
+        execute("y = 2", {})
+
+        stats = cache_stats()
+        assert stats["results"]["hits"] == 1
+        assert stats["statements"]["hits"] == 1
@@ -0,0 +1,270 @@
+"""Test cases for the concurrency helpers."""
+
+import asyncio
+import contextvars
+import inspect
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+from fastmcp import Client, FastMCP
+
+from mcp_server.concurrency import (
+    ExecutorPolicy,
+    ExecutorPool,
+    ExecutorRegistry,
+    default_pool_size,
+    executors,
+    gil_enabled,
+    offload,
+    run_sync,
+    tool,
+)
+from mcp_server.server import ServerConfig
+
+request_tag: contextvars.ContextVar[str] = contextvars.ContextVar("request_tag")
+
+
+def _current_thread_name() -> str:
+    return threading.current_thread().name
+
+
+@pytest.mark.asyncio
+class TestRunSync:
+    """Test cases for run_sync."""
+
+    async def test_run_sync_returns_result(self):
+        """Test that run_sync returns the callable's result."""
+        result = await run_sync(pow, 2, 10)
+        assert result == 1024
+
+    async def test_run_sync_passes_keyword_arguments(self):
+        """Test that run_sync forwards keyword arguments."""
+        result = await run_sync(int, "ff", base=16)
+        assert result == 255
+
+    async def test_run_sync_uses_shared_pool_thread(self):
+        """Test that run_sync runs in the shared pool, off the event loop."""
+        worker_thread = await run_sync(_current_thread_name)
+        assert worker_thread != threading.current_thread().name
+        assert worker_thread.startswith("mcp-shared")
+
+    async def test_run_sync_propagates_exceptions(self):
+        """Test that exceptions raised in the worker are re-raised."""
+        with pytest.raises(ZeroDivisionError):
+            await run_sync(divmod, 1, 0)
+
+    async def test_run_sync_propagates_context_variables(self):
+        """Test that context variables are visible in the worker thread."""
+        request_tag.set("abc")
+        assert await run_sync(request_tag.get) == "abc"
+
+
+@pytest.mark.asyncio
+class TestOffload:
+    """Test cases for the offload decorator."""
+
+    async def test_offload_produces_coroutine_function(self):
+        """Test that offload turns a sync function into an async one."""
+
+        @offload
+        def add(a: int, b: int) -> int:
+            return a + b
+
+        assert inspect.iscoroutinefunction(add)
+        assert await add(2, 3) == 5
+
+    async def test_offload_preserves_metadata(self):
+        """Test that offload keeps the name, docstring and signature."""
+
+        def add(a: int, b: int = 1) -> int:
+            """Add two numbers."""
+            return a + b
+
+        wrapped = offload(add)
+
+        assert wrapped.__name__ == "add"
+        assert wrapped.__doc__ == "Add two numbers."
+        assert inspect.signature(wrapped) == inspect.signature(add)
+
+    async def test_offload_inline_runs_on_event_loop(self):
+        """Test that the inline policy runs on the calling thread."""
+        wrapped = offload(_current_thread_name, policy=ExecutorPolicy.INLINE)
+        assert await wrapped() == threading.current_thread().name
+
+    async def test_offload_dedicated_uses_named_pool(self):
+        """Test that the dedicated policy runs in a pool named after the function."""
+
+        def isolated_worker() -> str:
+            return threading.current_thread().name
+
+        wrapped = offload(isolated_worker, policy=ExecutorPolicy.DEDICATED)
+
+        assert (await wrapped()).startswith("mcp-isolated_worker")
+        assert "isolated_worker" in executors.stats()["dedicated"]
+
+
+@pytest.mark.asyncio
+class TestExecutorPool:
+    """Test cases for ExecutorPool."""
+
+    async def test_pool_stats_track_completed_calls(self):
+        """Test that completed calls are counted."""
+        pool = ExecutorPool("test", 2)
+        try:
+            await asyncio.gather(*[pool.run(abs, -i) for i in range(5)])
+            stats = pool.stats()
+        finally:
+            pool.shutdown()
+
+        assert stats["completed"] == 5
+        assert stats["in_flight"] == 0
+        assert stats["max_workers"] == 2
+
+    async def test_pool_reports_saturation(self):
+        """Test that queueing beyond the worker count is reported."""
+        pool = ExecutorPool("tiny", 1)
+        try:
+            with patch("mcp_server.concurrency.logger") as mock_logger:
+                await asyncio.gather(*[pool.run(time.sleep, 0.05) for _ in range(3)])
+            stats = pool.stats()
+        finally:
+            pool.shutdown()
+
+        assert stats["saturation_events"] == 1
+        assert stats["peak_in_flight"] == 3
+        mock_logger.warning.assert_called_once()
+
+    async def test_cancelled_calls_stay_in_flight_until_done(self):
+        """Test that cancelling callers does not hide a busy worker."""
+        pool = ExecutorPool("cancel", 1)
+        try:
+            calls = [asyncio.create_task(pool.run(time.sleep, 0.3)) for _ in range(3)]
+            await asyncio.sleep(0.05)
+            for call in calls:
+                call.cancel()
+            await asyncio.gather(*calls, return_exceptions=True)
+            busy = pool.stats()
+            await asyncio.sleep(0.4)
+            idle = pool.stats()
+        finally:
+            pool.shutdown()
+
+        assert busy["in_flight"] == 1
+        assert busy["cancelled"] == 3
+        assert busy["completed"] == 0
+        assert idle["in_flight"] == 0
+
+    async def test_pool_runs_calls_in_parallel(self):
+        """Test that a pool runs up to max_workers calls at once."""
+        pool = ExecutorPool("parallel", 4)
+        try:
+            start = time.perf_counter()
+            await asyncio.gather(*[pool.run(time.sleep, 0.1) for _ in range(4)])
+            elapsed = time.perf_counter() - start
+        finally:
+            pool.shutdown()
+
+        assert elapsed < 0.3
+
+
+class TestExecutorRegistry:
+    """Test cases for ExecutorRegistry."""
+
+    def test_shared_pool_size_from_config(self):
+        """Test that the shared pool is sized from the configuration."""
+        config = ServerConfig()
+        config.shared_pool_size = 3
+        registry = ExecutorRegistry(config)
+        try:
+            assert registry.shared().max_workers == 3
+        finally:
+            registry.shutdown()
+
+    def test_shared_pool_default_size(self):
+        """Test that an unset shared pool size uses the interpreter default."""
+        registry = ExecutorRegistry(ServerConfig())
+        try:
+            assert registry.shared().max_workers == default_pool_size()
+        finally:
+            registry.shutdown()
+
+    def test_dedicated_pools_are_per_name(self):
+        """Test that each name gets its own dedicated pool."""
+        config = ServerConfig()
+        config.dedicated_pool_size = 2
+        registry = ExecutorRegistry(config)
+        try:
+            first = registry.dedicated("a")
+            assert registry.dedicated("a") is first
+            assert registry.dedicated("b") is not first
+            assert first.max_workers == 2
+        finally:
+            registry.shutdown()
+
+    def test_pool_for_inline_is_none(self):
+        """Test that the inline policy maps to no pool."""
+        registry = ExecutorRegistry()
+        assert registry.pool_for(ExecutorPolicy.INLINE, "x") is None
+
+    def test_configure_recreates_pools(self):
+        """Test that configure replaces pools with newly sized ones."""
+        registry = ExecutorRegistry()
+        try:
+            registry.shared()
+            config = ServerConfig()
+            config.shared_pool_size = 7
+            registry.configure(config)
+            assert registry.shared().max_workers == 7
+        finally:
+            registry.shutdown()
+
+    def test_stats_lists_created_pools(self):
+        """Test that stats include only pools that were created."""
+        registry = ExecutorRegistry()
+        try:
+            assert registry.stats()["shared"] is None
+            registry.dedicated("tool")
+            stats = registry.stats()
+        finally:
+            registry.shutdown()
+
+        assert stats["gil_enabled"] == gil_enabled()
+        assert set(stats["dedicated"]) == {"tool"}
+
+
+@pytest.mark.asyncio
+class TestToolRegistration:
+    """Test cases for the tool registration helper."""
+
+    async def test_tool_registers_sync_handler(self):
+        """Test that a sync handler is registered with the same schema."""
+        server = FastMCP("test")
+
+        @tool(server, executor=ExecutorPolicy.DEDICATED)
+        def where(label: str) -> str:
+            """Report the worker thread."""
+            return f"{label}:{threading.current_thread().name}"
+
+        async with Client(server) as client:
+            tools = await client.list_tools()
+            result = await client.call_tool("where", {"label": "x"})
+
+        assert tools[0].description == "Report the worker thread."
+        assert tools[0].inputSchema["required"] == ["label"]
+        assert result.data.startswith("x:mcp-where")
+
+    async def test_tool_keeps_async_handler_on_event_loop(self):
+        """Test that async handlers are registered unchanged."""
+        server = FastMCP("test")
+        loop_thread = threading.current_thread().name
+
+        @tool(server, executor=ExecutorPolicy.SHARED)
+        async def where() -> str:
+            return threading.current_thread().name
+
+        async with Client(server) as client:
+            result = await client.call_tool("where", {})
+
+        assert result.data == loop_thread
@@ -0,0 +1,443 @@
+"""Test cases for gateway mode."""
+
+import asyncio
+import time
+
+import pytest
+from fastmcp import Client, FastMCP
+from fastmcp.exceptions import ToolError
+from fastmcp.server.middleware import Middleware
+
+from mcp_server.gateway import (
+    Backend,
+    BackendUnavailableError,
+    CircuitBreaker,
+    Gateway,
+)
+from mcp_server.server import ServerConfig
+
+
+class ListingCounter(Middleware):
+    """Count and optionally delay tools/list requests on a backend."""
+
+    def __init__(self, delay: float = 0.0) -> None:
+        self.delay = delay
+        self.listings = 0
+
+    async def on_list_tools(self, context, call_next):
+        self.listings += 1
+        await asyncio.sleep(self.delay)
+        return await call_next(context)
+
+
+def math_server(list_delay: float = 0.0) -> tuple[FastMCP, ListingCounter]:
+    """Build a backend with a couple of tools."""
+    server = FastMCP("math")
+    counter = ListingCounter(list_delay)
+    server.add_middleware(counter)
+
+    @server.tool
+    def add(a: int, b: int) -> int:
+        return a + b
+
+    @server.tool
+    def fail() -> str:
+        raise ValueError("backend tool failed")
+
+    return server, counter
+
+
+def slow_server(delay: float) -> FastMCP:
+    """Build a backend whose only tool takes ``delay`` seconds."""
+    server = FastMCP("slow")
+
+    @server.tool
+    async def wait() -> str:
+        await asyncio.sleep(delay)
+        return "done"
+
+    return server
+
+
+def gateway_config(**overrides) -> ServerConfig:
+    """Build a configuration with short gateway timeouts."""
+    config = ServerConfig()
+    config.gateway_timeout = 0.5
+    config.gateway_breaker_cooldown = 60.0
+    for key, value in overrides.items():
+        setattr(config, key, value)
+    return config
+
+
+def front_server(gateway: Gateway) -> FastMCP:
+    """Build a gateway server with one local tool."""
+    server = FastMCP("front")
+
+    @server.tool
+    def local() -> str:
+        return "local"
+
+    gateway.attach(server)
+    return server
+
+
+class TestCircuitBreaker:
+    """Test cases for CircuitBreaker."""
+
+    def test_opens_after_threshold(self):
+        """Test that consecutive failures open the breaker."""
+        breaker = CircuitBreaker(threshold=3, cooldown=10.0, clock=lambda: 0.0)
+
+        for _ in range(2):
+            breaker.record_failure()
+        assert breaker.state == CircuitBreaker.CLOSED
+        breaker.record_failure()
+
+        assert breaker.state == CircuitBreaker.OPEN
+        assert not breaker.allow()
+
+    def test_success_resets_failure_count(self):
+        """Test that only consecutive failures count."""
+        breaker = CircuitBreaker(threshold=2, clock=lambda: 0.0)
+
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_half_open_allows_one_trial(self):
+        """Test that after the cooldown a single trial call is let through."""
+        now = [0.0]
+        breaker = CircuitBreaker(threshold=1, cooldown=10.0, clock=lambda: now[0])
+        breaker.record_failure()
+
+        now[0] = 10.0
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert breaker.allow()
+        assert not breaker.allow()
+
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_failed_trial_reopens(self):
+        """Test that a failed trial re-opens the breaker for a full cooldown."""
+        now = [0.0]
+        breaker = CircuitBreaker(threshold=1, cooldown=10.0, clock=lambda: now[0])
+        breaker.record_failure()
+
+        now[0] = 15.0
+        assert breaker.allow()
+        breaker.record_failure()
+
+        now[0] = 20.0
+        assert breaker.state == CircuitBreaker.OPEN
+
+    def test_cancelled_trial_allows_another(self):
+        """Test that an abandoned trial does not leave the breaker stuck."""
+        now = [0.0]
+        breaker = CircuitBreaker(threshold=1, cooldown=10.0, clock=lambda: now[0])
+        breaker.record_failure()
+        now[0] = 10.0
+        assert breaker.allow()
+
+        breaker.record_cancelled()
+
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert breaker.allow()
+
+
+class TestGatewayConfig:
+    """Test cases for configuring and mounting backends."""
+
+    def test_configure_mounts_backends(self):
+        """Test that configured backends are mounted with configured limits."""
+        config = gateway_config(
+            gateway_backends={"web": "http://localhost:8001/mcp"},
+            gateway_pool_size=3,
+        )
+
+        gateway = Gateway(config)
+
+        (backend,) = gateway.backends
+        assert backend.namespace == "web"
+        assert backend.timeout == 0.5
+        assert backend.stats()["pool_size"] == 3
+
+    def test_reconfigure_keeps_unchanged_backends(self):
+        """Test that re-applying a config reuses backends with the same spec."""
+        config = gateway_config(gateway_backends={"web": "http://localhost:8001/mcp"})
+        gateway = Gateway(config)
+        (backend,) = gateway.backends
+
+        gateway.configure(config)
+
+        assert gateway.backends[0] is backend
+
+    @pytest.mark.parametrize("namespace", ["", "has_underscore", "1st", "a b"])
+    def test_invalid_namespace_rejected(self, namespace):
+        """Test that namespaces must not contain the separator."""
+        with pytest.raises(ValueError, match="Invalid namespace"):
+            Backend(namespace, "http://localhost:8001/mcp")
+
+    def test_duplicate_namespace_rejected(self):
+        """Test that a namespace can only be mounted once."""
+        gateway = Gateway(gateway_config())
+        gateway.mount("web", "http://localhost:8001/mcp")
+
+        with pytest.raises(ValueError, match="already mounted"):
+            gateway.mount("web", "http://localhost:8002/mcp")
+
+    def test_backend_for(self):
+        """Test splitting namespaced tool names."""
+        gateway = Gateway(gateway_config())
+        backend = gateway.mount("math", "http://localhost:8001/mcp")
+
+        assert gateway.backend_for("math_add") == (backend, "add")
+        assert gateway.backend_for("math_add_more") == (backend, "add_more")
+        assert gateway.backend_for("math_") is None
+        assert gateway.backend_for("other_add") is None
+        assert gateway.backend_for("local") is None
+
+
+@pytest.mark.asyncio
+class TestGatewayRouting:
+    """Test cases for listing and calling backend tools through the gateway."""
+
+    async def test_tools_listed_under_namespace(self):
+        """Test that backend tools are merged with local tools."""
+        backend, _ = math_server()
+        gateway = Gateway(gateway_config())
+        gateway.mount("math", backend)
+
+        async with Client(front_server(gateway)) as client:
+            names = {tool.name for tool in await client.list_tools()}
+        await gateway.close()
+
+        assert names == {"local", "math_add", "math_fail"}
+
+    async def test_call_routed_to_backend(self):
+        """Test that namespaced calls reach the backend and local calls do not."""
+        backend, _ = math_server()
+        gateway = Gateway(gateway_config())
+        gateway.mount("math", backend)
+
+        async with Client(front_server(gateway)) as client:
+            remote = await client.call_tool("math_add", {"a": 2, "b": 3})
+            local = await client.call_tool("local", {})
+        await gateway.close()
+
+        assert remote.data == 5
+        assert local.data == "local"
+
+    async def test_local_tools_shadow_backend_tools(self):
+        """Test that a namespace cannot hijack a local tool of the same name."""
+        backend = FastMCP("local-clash")
+
+        @backend.tool
+        def thing() -> str:
+            return "backend"
+
+        @backend.tool
+        def other() -> str:
+            return "backend"
+
+        gateway = Gateway(gateway_config())
+        gateway.mount("local", backend)
+        server = FastMCP("front")
+
+        @server.tool
+        def local_thing() -> str:
+            return "local"
+
+        gateway.attach(server)
+        async with Client(server) as client:
+            names = [tool.name for tool in await client.list_tools()]
+            shadowed = await client.call_tool("local_thing", {})
+            routed = await client.call_tool("local_other", {})
+        await gateway.close()
+
+        assert sorted(names) == ["local_other", "local_thing"]
+        assert shadowed.data == "local"
+        assert routed.data == "backend"
+
+    async def test_cancelled_trial_does_not_stick_breaker(self):
+        """Test that cancelling the half-open trial call frees the breaker."""
+        gateway = Gateway(
+            gateway_config(gateway_breaker_threshold=1, gateway_breaker_cooldown=0.0)
+        )
+        slow = gateway.mount("slow", slow_server(delay=5.0))
+        slow.breaker.record_failure()
+
+        trial = asyncio.create_task(gateway.call_tool("slow_wait", {}))
+        await asyncio.sleep(0.2)
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+        await gateway.close()
+
+        assert slow.breaker.allow()
+
+    async def test_backend_tool_error_propagated(self):
+        """Test that a backend tool error reaches the client without tripping."""
+        backend, _ = math_server()
+        gateway = Gateway(gateway_config(gateway_breaker_threshold=1))
+        mounted = gateway.mount("math", backend)
+
+        async with Client(front_server(gateway)) as client:
+            with pytest.raises(ToolError, match="backend tool failed"):
+                await client.call_tool("math_fail", {})
+        await gateway.close()
+
+        assert mounted.breaker.state == CircuitBreaker.CLOSED
+
+    async def test_connections_are_pooled(self):
+        """Test that many calls share a fixed number of backend sessions."""
+        backend, _ = math_server()
+        gateway = Gateway(gateway_config(gateway_pool_size=2))
+        mounted = gateway.mount("math", backend)
+
+        results = await asyncio.gather(
+            *(gateway.call_tool("math_add", {"a": i, "b": 1}) for i in range(20))
+        )
+        clients = {id(c.client) for c in mounted._pool}
+        await gateway.call_tool("math_add", {"a": 0, "b": 0})
+
+        assert [r.structured_content["result"] for r in results] == [
+            i + 1 for i in range(20)
+        ]
+        assert mounted.stats()["connections"] == 2
+        assert {id(c.client) for c in mounted._pool} == clients
+        await gateway.close()
+        assert mounted.stats()["connections"] == 0
+
+    async def test_listing_is_cached(self):
+        """Test that listings within the TTL do not reach the backend."""
+        backend, counter = math_server()
+        gateway = Gateway(gateway_config())
+        mounted = gateway.mount("math", backend)
+
+        await gateway.list_tools()
+        await gateway.list_tools()
+        assert counter.listings == 1
+
+        mounted.invalidate()
+        await gateway.list_tools()
+        await mounted._refresh_task
+        assert counter.listings == 2
+        await gateway.close()
+
+    async def test_listing_fans_out_concurrently(self):
+        """Test that slow listings overlap rather than add up."""
+        gateway = Gateway(gateway_config())
+        for namespace in ("a", "b", "c"):
+            gateway.mount(namespace, math_server(list_delay=0.2)[0])
+
+        start = time.perf_counter()
+        tools = await gateway.list_tools()
+        elapsed = time.perf_counter() - start
+        await gateway.close()
+
+        assert len(tools) == 6
+        assert elapsed < 0.5
+
+    async def test_stale_listing_served_while_refreshing(self):
+        """Test that an expired listing is returned without waiting."""
+        backend, counter = math_server()
+        gateway = Gateway(gateway_config(gateway_timeout=2.0))
+        mounted = gateway.mount("math", backend)
+        await gateway.list_tools()
+        counter.delay = 1.0
+        mounted.invalidate()
+
+        start = time.perf_counter()
+        tools = await gateway.list_tools()
+        elapsed = time.perf_counter() - start
+        await mounted._refresh_task
+        await gateway.close()
+
+        assert {tool.name for tool in tools} == {"math_add", "math_fail"}
+        assert elapsed < 0.2
+        assert counter.listings == 2
+
+    async def test_connect_timeout_closes_client(self, monkeypatch):
+        """Test that a session that cannot start in time is closed."""
+        closed = []
+
+        class HangingClient:
+            async def __aenter__(self):
+                await asyncio.sleep(10)
+
+            async def close(self):
+                closed.append(True)
+
+        gateway = Gateway(gateway_config(gateway_timeout=0.1))
+        hanging = gateway.mount("hang", "http://localhost:9/mcp")
+        monkeypatch.setattr(hanging, "_new_client", HangingClient)
+
+        with pytest.raises(BackendUnavailableError, match="timed out"):
+            await gateway.call_tool("hang_anything", {})
+        await gateway.close()
+
+        assert closed == [True]
+
+    async def test_slow_listing_does_not_block_others(self):
+        """Test that a backend that cannot list in time is skipped."""
+        gateway = Gateway(gateway_config(gateway_timeout=0.2))
+        gateway.mount("fast", math_server()[0])
+        gateway.mount("stuck", math_server(list_delay=5.0)[0])
+
+        start = time.perf_counter()
+        tools = await gateway.list_tools()
+        elapsed = time.perf_counter() - start
+        await gateway.close()
+
+        assert {tool.name for tool in tools} == {"fast_add", "fast_fail"}
+        assert elapsed < 1.0
+
+    async def test_timeout_isolated_to_backend(self):
+        """Test that a slow backend times out while others keep answering."""
+        gateway = Gateway(gateway_config(gateway_timeout=0.2))
+        gateway.mount("fast", math_server()[0])
+        slow = gateway.mount("slow", slow_server(delay=5.0))
+
+        slow_call = asyncio.create_task(gateway.call_tool("slow_wait", {}))
+        fast_result = await gateway.call_tool("fast_add", {"a": 1, "b": 1})
+        with pytest.raises(BackendUnavailableError, match="timed out"):
+            await slow_call
+        await gateway.close()
+
+        assert fast_result.structured_content == {"result": 2}
+        assert slow.stats()["timeouts"] == 1
+
+    async def test_breaker_sheds_failing_backend(self):
+        """Test that an open breaker rejects calls without contacting the backend."""
+        gateway = Gateway(
+            gateway_config(gateway_timeout=0.1, gateway_breaker_threshold=2)
+        )
+        slow = gateway.mount("slow", slow_server(delay=5.0))
+
+        for _ in range(2):
+            with pytest.raises(BackendUnavailableError, match="timed out"):
+                await gateway.call_tool("slow_wait", {})
+        start = time.perf_counter()
+        with pytest.raises(BackendUnavailableError, match="circuit open"):
+            await gateway.call_tool("slow_wait", {})
+        elapsed = time.perf_counter() - start
+        await gateway.close()
+
+        assert elapsed < 0.05
+        assert slow.stats()["state"] == CircuitBreaker.OPEN
+        assert slow.stats()["rejected"] == 1
+
+    async def test_unreachable_backend_reports_failure(self):
+        """Test that a backend that cannot be started fails cleanly."""
+        gateway = Gateway(gateway_config(gateway_timeout=2.0))
+        broken = gateway.mount("broken", {"command": "/nonexistent/mcp-server"})
+
+        with pytest.raises(BackendUnavailableError, match="broken"):
+            await gateway.call_tool("broken_anything", {})
+        assert await gateway.list_tools() == []
+        await gateway.close()
+
+        assert broken.stats()["failures"] == 2
@@ -157,6 +157,12 @@ class TestServerResources:
         assert "calculate" in settings["capabilities"]
         assert "greet" in settings["capabilities"]
 
+    async def test_capabilities_match_registered_tools(self):
+        """Test that the advertised capabilities are the registered tools."""
+        tools = await mcp.get_tools()
+
+        assert sorted(get_settings()["capabilities"]) == sorted(tools)
+
     def test_server_info_resource(self):
         """Test the server info resource."""
         info = get_server_info()
@@ -234,3 +240,60 @@ class TestAsyncIntegration:
         assert len(results) == 5
         for i, result in enumerate(results):
             assert f"Hello, {names[i]}!" in result
+
+
+@pytest.mark.asyncio
+class TestPipelinedRequests:
+    """Test that a single client session gets concurrent request handling."""
+
+    async def test_blocking_calls_run_in_parallel(self):
+        """Test that slow calculate calls do not queue behind each other."""
+        import asyncio
+        import time
+
+        from fastmcp import Client
+
+        def slow_calculate(expression: str, session_id: str | None = None) -> str:
+            time.sleep(0.2)
+            return f"done {expression}"
+
+        with patch("mcp_server.main._calculate", slow_calculate):
+            async with Client(mcp) as client:
+                start = time.perf_counter()
+                results = await asyncio.gather(
+                    *[
+                        client.call_tool("calculate", {"expression": str(i)})
+                        for i in range(5)
+                    ]
+                )
+                elapsed = time.perf_counter() - start
+
+        assert [r.data for r in results] == [f"done {i}" for i in range(5)]
+        assert elapsed < 0.2 * 5 / 2
+
+    async def test_fast_call_completes_before_slow_call(self):
+        """Test that responses are returned out of order as they complete."""
+        import asyncio
+        import time
+
+        from fastmcp import Client
+
+        def slow_calculate(expression: str, session_id: str | None = None) -> str:
+            time.sleep(0.3)
+            return "slow"
+
+        completed = []
+
+        async def call(client, tool, arguments):
+            result = await client.call_tool(tool, arguments)
+            completed.append(tool)
+            return result
+
+        with patch("mcp_server.main._calculate", slow_calculate):
+            async with Client(mcp) as client:
+                await asyncio.gather(
+                    call(client, "calculate", {"expression": "1"}),
+                    call(client, "greet", {"name": "Fast"}),
+                )
+
+        assert completed == ["greet", "calculate"]
@@ -197,3 +197,35 @@ class TestMainFunction:
 
         # Verify error logging
         mock_logger.error.assert_called_with("Server error: Test error")
+
+    @patch("mcp_server.main.mcp")
+    @patch("mcp_server.main.logger")
+    def test_main_function_missing_warm_cache(
+        self, mock_logger, mock_mcp, monkeypatch, tmp_path
+    ):
+        """Test that a missing warm-up file does not stop the server."""
+        from mcp_server.main import main
+
+        monkeypatch.setenv("MCP_WARM_CACHE", str(tmp_path / "missing.jsonl"))
+
+        main()
+
+        mock_logger.warning.assert_called_once()
+        assert "warm-up skipped" in mock_logger.warning.call_args[0][0]
+        mock_mcp.run.assert_called_once()
+
+    @patch("mcp_server.main.mcp")
+    @patch("mcp_server.main.logger")
+    def test_main_function_corrupt_warm_cache(
+        self, mock_logger, mock_mcp, monkeypatch, tmp_path
+    ):
+        """Test that a corrupt warm-up file does not stop the server."""
+        from mcp_server.main import main
+
+        path = tmp_path / "capture.jsonl.gz"
+        path.write_bytes(b"\x1f\x8b\x08\x00" + b"\xff" * 64)
+        monkeypatch.setenv("MCP_WARM_CACHE", str(path))
+
+        main()
+
+        mock_mcp.run.assert_called_once()
@@ -26,13 +26,46 @@ class TestServerConfig:
         config = ServerConfig()
         config_dict = config.to_dict()
 
-        expected_keys = {"name", "version", "max_connections", "timeout", "log_level"}
+        expected_keys = {
+            "name",
+            "version",
+            "max_connections",
+            "timeout",
+            "log_level",
+            "shared_pool_size",
+            "dedicated_pool_size",
+            "audit_log_path",
+            "audit_queue_size",
+            "audit_overflow_policy",
+            "audit_flush_interval",
+            "audit_flush_bytes",
+            "audit_max_bytes",
+            "audit_backup_count",
+            "resource_update_window",
+            "gateway_backends",
+            "gateway_pool_size",
+            "gateway_timeout",
+            "gateway_list_ttl",
+            "gateway_breaker_threshold",
+            "gateway_breaker_cooldown",
+            "session_memory_budget",
+            "session_max_values",
+            "session_idle_ttl",
+            "capture_path",
+            "capture_sample_rate",
+            "warm_cache_path",
+        }
         assert set(config_dict.keys()) == expected_keys
         assert config_dict["name"] == "Example MCP Server"
         assert config_dict["version"] == "0.1.0"
         assert config_dict["max_connections"] == 100
         assert config_dict["timeout"] == 30
         assert config_dict["log_level"] == logging.INFO
+        assert config_dict["shared_pool_size"] is None
+        assert config_dict["dedicated_pool_size"] == 4
+        assert config_dict["audit_log_path"] is None
+        assert config_dict["audit_overflow_policy"] == "drop"
+        assert config_dict["gateway_backends"] == {}
 
     def test_server_config_modification(self):
         """Test ServerConfig value modification."""
@@ -48,6 +81,94 @@ class TestServerConfig:
         assert config_dict["max_connections"] == 50
 
 
+class TestServerConfigFromEnv:
+    """Test cases for ServerConfig.from_env."""
+
+    def test_from_env_defaults(self, monkeypatch):
+        """Test that from_env keeps defaults when no variables are set."""
+        for name in (
+            "LOG_LEVEL",
+            "MCP_SHARED_POOL_SIZE",
+            "MCP_DEDICATED_POOL_SIZE",
+            "MCP_AUDIT_LOG",
+            "MCP_AUDIT_QUEUE_SIZE",
+            "MCP_AUDIT_OVERFLOW",
+        ):
+            monkeypatch.delenv(name, raising=False)
+
+        config = ServerConfig.from_env()
+
+        assert config.to_dict() == ServerConfig().to_dict()
+
+    def test_from_env_overrides(self, monkeypatch):
+        """Test that from_env applies environment overrides."""
+        monkeypatch.setenv("LOG_LEVEL", "debug")
+        monkeypatch.setenv("MCP_SHARED_POOL_SIZE", "8")
+        monkeypatch.setenv("MCP_DEDICATED_POOL_SIZE", "2")
+        monkeypatch.setenv("MCP_AUDIT_LOG", "/tmp/audit.jsonl")
+        monkeypatch.setenv("MCP_AUDIT_QUEUE_SIZE", "50")
+        monkeypatch.setenv("MCP_AUDIT_OVERFLOW", "block")
+
+        config = ServerConfig.from_env()
+
+        assert config.log_level == logging.DEBUG
+        assert config.shared_pool_size == 8
+        assert config.dedicated_pool_size == 2
+        assert config.audit_log_path == "/tmp/audit.jsonl"
+        assert config.audit_queue_size == 50
+        assert config.audit_overflow_policy == "block"
+
+    def test_from_env_gateway_backends(self, monkeypatch):
+        """Test that gateway backends are read as a JSON object."""
+        monkeypatch.setenv(
+            "MCP_GATEWAY_BACKENDS",
+            '{"files": {"command": "files-server"}, "web": "http://localhost:8001/mcp"}',
+        )
+        monkeypatch.setenv("MCP_GATEWAY_POOL_SIZE", "3")
+        monkeypatch.setenv("MCP_GATEWAY_TIMEOUT", "2.5")
+
+        config = ServerConfig.from_env()
+
+        assert config.gateway_backends == {
+            "files": {"command": "files-server"},
+            "web": "http://localhost:8001/mcp",
+        }
+        assert config.gateway_pool_size == 3
+        assert config.gateway_timeout == 2.5
+
+    def test_from_env_session_limits(self, monkeypatch):
+        """Test that session store limits are read from the environment."""
+        monkeypatch.setenv("MCP_SESSION_MEMORY_BUDGET", "1048576")
+        monkeypatch.setenv("MCP_SESSION_MAX_VALUES", "16")
+        monkeypatch.setenv("MCP_SESSION_IDLE_TTL", "60")
+
+        config = ServerConfig.from_env()
+
+        assert config.session_memory_budget == 1048576
+        assert config.session_max_values == 16
+        assert config.session_idle_ttl == 60.0
+
+    def test_from_env_traffic_capture(self, monkeypatch):
+        """Test that capture and warm-up paths are read from the environment."""
+        monkeypatch.setenv("MCP_CAPTURE", "/tmp/capture.jsonl.gz")
+        monkeypatch.setenv("MCP_CAPTURE_SAMPLE_RATE", "0.1")
+        monkeypatch.setenv("MCP_WARM_CACHE", "/tmp/warm.jsonl.gz")
+
+        config = ServerConfig.from_env()
+
+        assert config.capture_path == "/tmp/capture.jsonl.gz"
+        assert config.capture_sample_rate == 0.1
+        assert config.warm_cache_path == "/tmp/warm.jsonl.gz"
+
+    def test_from_env_ignores_unknown_log_level(self, monkeypatch):
+        """Test that an unknown LOG_LEVEL falls back to the default."""
+        monkeypatch.setenv("LOG_LEVEL", "chatty")
+
+        config = ServerConfig.from_env()
+
+        assert config.log_level == logging.INFO
+
+
 class TestSetupLogging:
     """Test cases for setup_logging function."""
 
@@ -0,0 +1,203 @@
+"""Test cases for per-session calculator variables."""
+
+import pytest
+from fastmcp import Client
+
+from mcp_server.main import _calculate as calculate
+from mcp_server.main import mcp
+from mcp_server.server import ServerConfig
+from mcp_server.sessions import (
+    SESSION_OVERHEAD,
+    SessionLimitError,
+    SessionStore,
+    entry_size,
+    sessions,
+)
+
+
+class FakeClock:
+    """A manually advanced monotonic clock."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_store(**overrides) -> tuple[SessionStore, FakeClock]:
+    """Build a store with a fake clock and configuration overrides."""
+    config = ServerConfig()
+    for key, value in overrides.items():
+        setattr(config, key, value)
+    clock = FakeClock()
+    return SessionStore(config, clock=clock), clock
+
+
+class TestSessionStore:
+    """Test cases for SessionStore."""
+
+    def test_sessions_are_isolated(self):
+        """Test that variables are only visible to their own session."""
+        store, _ = make_store()
+
+        store.assign("a", "x", 1)
+        store.assign("b", "x", 2)
+
+        assert store.variables("a") == {"x": 1}
+        assert store.variables("b") == {"x": 2}
+        assert store.variables("c") == {}
+
+    def test_variables_returns_a_copy(self):
+        """Test that callers cannot modify the store through a snapshot."""
+        store, _ = make_store()
+        store.assign("a", "x", 1)
+
+        store.variables("a")["x"] = 99
+
+        assert store.variables("a") == {"x": 1}
+
+    def test_size_accounting(self):
+        """Test that overwrites and clears keep the byte count exact."""
+        store, _ = make_store()
+
+        store.assign("a", "x", 1)
+        store.assign("a", "x", 10**100)
+        assert store.stats()["bytes"] == SESSION_OVERHEAD + entry_size("x", 10**100)
+
+        assert store.clear("a") == 1
+        assert store.stats()["bytes"] == 0
+        assert store.clear("a") == 0
+
+    def test_max_values_per_session(self):
+        """Test that a session cannot exceed its variable limit."""
+        store, _ = make_store(session_max_values=2)
+        store.assign("a", "x", 1)
+        store.assign("a", "y", 2)
+
+        with pytest.raises(SessionLimitError, match="Too many variables"):
+            store.assign("a", "z", 3)
+        store.assign("a", "x", 3)
+
+        assert store.variables("a") == {"x": 3, "y": 2}
+
+    def test_least_recently_used_session_evicted(self):
+        """Test that the budget evicts the session idle the longest."""
+        per_session = SESSION_OVERHEAD + entry_size("x", 1)
+        store, _ = make_store(session_memory_budget=per_session * 3)
+        for session_id in ("a", "b", "c"):
+            store.assign(session_id, "x", 1)
+
+        store.variables("a")
+        store.assign("d", "x", 1)
+
+        assert store.variables("b") == {}
+        assert store.variables("a") == {"x": 1}
+        assert store.stats()["evicted_sessions"] == 1
+        assert store.stats()["bytes"] <= per_session * 3
+
+    def test_value_larger_than_budget_rejected(self):
+        """Test that one session cannot claim more than the whole budget."""
+        store, _ = make_store(session_memory_budget=SESSION_OVERHEAD + 200)
+        store.assign("other", "x", 1)
+
+        with pytest.raises(SessionLimitError, match="memory budget"):
+            store.assign("a", "x", 2**9000)
+
+        assert store.variables("other") == {"x": 1}
+
+    def test_idle_sessions_expire(self):
+        """Test that sessions unused for the TTL are dropped."""
+        store, clock = make_store(session_idle_ttl=60.0)
+        store.assign("a", "x", 1)
+        clock.now = 30.0
+        store.assign("b", "x", 1)
+
+        clock.now = 70.0
+        assert store.variables("a") == {}
+        assert store.variables("b") == {"x": 1}
+        assert store.stats()["expired_sessions"] == 1
+
+    def test_reconfigure_shrinks_to_budget(self):
+        """Test that lowering the budget evicts sessions immediately."""
+        store, _ = make_store()
+        for i in range(10):
+            store.assign(str(i), "x", 1)
+
+        config = ServerConfig()
+        config.session_memory_budget = (SESSION_OVERHEAD + entry_size("x", 1)) * 4
+        store.configure(config)
+
+        assert store.stats()["sessions"] == 4
+        assert store.variables("9") == {"x": 1}
+
+    def test_many_sessions_stay_within_budget(self):
+        """Test that thousands of sessions never exceed the budget."""
+        budget = 256 * 1024
+        store, clock = make_store(session_memory_budget=budget)
+
+        for i in range(5000):
+            clock.now = float(i)
+            store.assign(f"session-{i}", "x", i)
+            store.assign(f"session-{i}", "y", i * 1.5)
+
+        stats = store.stats()
+        assert stats["bytes"] <= budget
+        assert stats["sessions"] + stats["evicted_sessions"] == 5000
+        assert store.variables("session-4999") == {"x": 4999, "y": 4999 * 1.5}
+
+
+class TestCalculateWithVariables:
+    """Test cases for calculate with a session."""
+
+    def setup_method(self):
+        sessions.clear("test-session")
+
+    def teardown_method(self):
+        sessions.clear("test-session")
+
+    def test_assign_then_use(self):
+        """Test that an assigned result is available to later calls."""
+        assert (
+            calculate("x = 3 * 7", "test-session") == "The result of 'x = 3 * 7' is 21"
+        )
+        assert calculate("x / 2", "test-session") == "The result of 'x / 2' is 10.5"
+
+    def test_unknown_variable(self):
+        """Test that an unassigned name is an error."""
+        result = calculate("y + 1", "test-session")
+        assert result == "Error calculating 'y + 1': Unknown variable 'y'"
+
+    def test_failed_assignment_not_stored(self):
+        """Test that an assignment whose value fails leaves no variable."""
+        result = calculate("x = 1 / 0", "test-session")
+
+        assert result.startswith("Error calculating")
+        assert sessions.variables("test-session") == {}
+
+    def test_names_need_a_session(self):
+        """Test that names are still rejected without a session."""
+        assert calculate("x + 1").startswith("Error: Invalid characters")
+
+
+@pytest.mark.asyncio
+class TestSessionTools:
+    """Test cases for variables through the MCP tools."""
+
+    async def test_variables_persist_within_a_session(self):
+        """Test that variables carry over between calls of one session only."""
+        async with Client(mcp) as client:
+            await client.call_tool("calculate", {"expression": "x = 3 * 7"})
+            result = await client.call_tool("calculate", {"expression": "x / 2"})
+            listed = await client.call_tool("list_variables", {})
+            cleared = await client.call_tool("clear_variables", {})
+            after = await client.call_tool("list_variables", {})
+
+        async with Client(mcp) as other:
+            isolated = await other.call_tool("calculate", {"expression": "x / 2"})
+
+        assert result.data == "The result of 'x / 2' is 10.5"
+        assert listed.structured_content == {"x": 21}
+        assert cleared.data == "Cleared 1 variables"
+        assert after.structured_content == {}
+        assert "Unknown variable 'x'" in isolated.data
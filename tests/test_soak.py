@@ -0,0 +1,146 @@
+"""Test cases for the soak test harness."""
+
+import random
+
+import pytest
+from fastmcp import FastMCP
+
+from mcp_server.calculator import CACHE_SIZE, configure_caches
+from mcp_server.soak import (
+    SoakReport,
+    current_rss,
+    default_workload,
+    main,
+    run_soak,
+    slope,
+)
+
+_leaked: list[bytes] = []
+
+
+def leaky_server() -> FastMCP:
+    """Build a server whose only tool retains memory on every call."""
+    server = FastMCP("leaky")
+
+    @server.tool(output_schema=None)
+    def leak() -> None:
+        _leaked.append(bytes(2048))
+
+    return server
+
+
+def leak_workload(rng: random.Random) -> tuple[str, str, dict]:
+    return "tool", "leak", {}
+
+
+class TestHelpers:
+    """Test cases for the soak helpers."""
+
+    def test_slope_of_line(self):
+        """Test the least-squares slope of an exact line."""
+        assert slope([0, 1, 2, 3], [5, 7, 9, 11]) == pytest.approx(2.0)
+
+    def test_slope_of_flat_or_short_series(self):
+        """Test that flat and single-point series have zero slope."""
+        assert slope([0, 1, 2], [4, 4, 4]) == 0.0
+        assert slope([1], [10]) == 0.0
+
+    def test_default_workload_mix(self):
+        """Test that the default workload covers every kind of operation."""
+        rng = random.Random(0)
+        targets = {default_workload(rng)[1] for _ in range(500)}
+        assert targets == {
+            "calculate",
+            "greet",
+            "config://settings",
+            "info://server",
+            "help",
+        }
+
+    def test_current_rss(self):
+        """Test that RSS is a positive byte count where available."""
+        rss = current_rss()
+        assert rss is None or rss > 0
+
+
+@pytest.mark.asyncio
+class TestRunSoak:
+    """Test cases for run_soak."""
+
+    async def test_server_does_not_grow(self):
+        """Test a short soak of the real server across several sessions."""
+        # A real soak fills the calculator caches during warm-up; shrink them
+        # so this short run does too.
+        configure_caches(8)
+        try:
+            # A short run is noisier than a real soak, so allow more slack
+            # than the defaults; a genuine per-call leak still exceeds it by far.
+            report = await run_soak(
+                calls=240,
+                sample_every=40,
+                session_calls=80,
+                concurrency=4,
+                max_bytes_per_call=64.0,
+                max_objects_per_call=0.5,
+            )
+        finally:
+            configure_caches(CACHE_SIZE)
+
+        assert isinstance(report, SoakReport)
+        assert report.calls == 240
+        assert len(report.samples) >= 5
+        assert report.passed, report.failures
+
+    async def test_leak_is_detected(self):
+        """Test that a leaking tool fails the soak and is named."""
+        _leaked.clear()
+        try:
+            report = await run_soak(
+                leaky_server(),
+                calls=300,
+                sample_every=50,
+                workload=leak_workload,
+            )
+        finally:
+            _leaked.clear()
+
+        assert not report.passed
+        assert report.bytes_per_call > 2000
+        assert any("test_soak.py" in line for line in report.top_growth)
+
+    async def test_warmup_must_leave_calls(self):
+        """Test that a run shorter than the warm-up is rejected."""
+        with pytest.raises(ValueError, match="warmup"):
+            await run_soak(
+                leaky_server(),
+                calls=10,
+                sample_every=5,
+                warmup_calls=20,
+                workload=leak_workload,
+            )
+
+
+class TestMain:
+    """Test cases for the command line entry point."""
+
+    def test_main_returns_failure_exit_code(self, monkeypatch, capsys):
+        """Test that a failed soak prints the growth sites and exits 1."""
+        report = SoakReport(
+            calls=10,
+            duration=1.0,
+            bytes_per_call=100.0,
+            objects_per_call=0.0,
+            samples=[],
+            top_growth=["leaky.py:1: size=1 KiB (+1 KiB)"],
+            failures=["Traced memory grows 100.00 bytes per call (limit 4.0)"],
+        )
+
+        async def fake_run_soak(**kwargs):
+            return report
+
+        monkeypatch.setattr("mcp_server.soak.run_soak", fake_run_soak)
+
+        assert main(["--calls", "10"]) == 1
+        output = capsys.readouterr().out
+        assert "FAIL: Traced memory grows" in output
+        assert "leaky.py:1" in output
@@ -0,0 +1,240 @@
+"""Test cases for resource subscriptions."""
+
+import asyncio
+import threading
+
+import mcp.types
+import pytest
+from fastmcp import Client, FastMCP
+from fastmcp.client.messages import MessageHandler
+from mcp.shared.exceptions import McpError
+
+from mcp_server import main
+from mcp_server.server import ServerConfig
+from mcp_server.subscriptions import SubscriptionManager, subscriptions
+
+
+class UpdateCollector(MessageHandler):
+    """Collect resources/updated notifications received by a client."""
+
+    def __init__(self) -> None:
+        self.updated: list[str] = []
+
+    async def on_resource_updated(
+        self, message: mcp.types.ResourceUpdatedNotification
+    ) -> None:
+        self.updated.append(str(message.params.uri))
+
+
+@pytest.fixture
+def counter_server():
+    """Provide a server with a resource backed by a mutable value."""
+    state = {"value": 0}
+    server = FastMCP("test")
+
+    @server.resource("data://counter")
+    def counter() -> str:
+        return str(state["value"])
+
+    config = ServerConfig()
+    config.resource_update_window = 0.02
+    manager = SubscriptionManager(config)
+    manager.attach(server)
+    return server, manager, state
+
+
+async def settle(manager: SubscriptionManager) -> None:
+    """Wait for the coalescing window and any notification sends."""
+    await asyncio.sleep(manager.coalesce_window * 5)
+
+
+@pytest.mark.asyncio
+class TestSubscriptionManager:
+    """Test cases for SubscriptionManager."""
+
+    async def test_subscribe_capability_advertised(self, counter_server):
+        """Test that the server advertises resource subscriptions."""
+        server, _, _ = counter_server
+
+        async with Client(server) as client:
+            capabilities = client.initialize_result.capabilities
+
+        assert capabilities.resources.subscribe is True
+
+    async def test_change_is_notified(self, counter_server):
+        """Test that a real change reaches the subscriber."""
+        server, manager, state = counter_server
+        collector = UpdateCollector()
+
+        async with Client(server, message_handler=collector) as client:
+            await client.session.subscribe_resource("data://counter")
+            assert manager.subscriber_count("data://counter") == 1
+
+            state["value"] = 1
+            manager.notify_changed("data://counter")
+            await settle(manager)
+
+        assert collector.updated == ["data://counter"]
+
+    async def test_unchanged_content_is_not_notified(self, counter_server):
+        """Test that change reports without a content change are ignored."""
+        server, manager, _ = counter_server
+        collector = UpdateCollector()
+
+        async with Client(server, message_handler=collector) as client:
+            await client.session.subscribe_resource("data://counter")
+            manager.notify_changed("data://counter")
+            await settle(manager)
+
+        assert collector.updated == []
+
+    async def test_bursts_are_coalesced(self, counter_server):
+        """Test that a burst of changes produces one notification."""
+        server, manager, state = counter_server
+        collector = UpdateCollector()
+
+        async with Client(server, message_handler=collector) as client:
+            await client.session.subscribe_resource("data://counter")
+            for value in range(1, 20):
+                state["value"] = value
+                manager.notify_changed("data://counter")
+            await settle(manager)
+
+        assert collector.updated == ["data://counter"]
+        assert manager.stats()["notifications_sent"] == 1
+
+    async def test_notify_from_worker_thread(self, counter_server):
+        """Test that change reports from other threads are delivered."""
+        server, manager, state = counter_server
+        collector = UpdateCollector()
+
+        def change_in_thread() -> None:
+            state["value"] = 42
+            manager.notify_changed("data://counter")
+
+        async with Client(server, message_handler=collector) as client:
+            await client.session.subscribe_resource("data://counter")
+            thread = threading.Thread(target=change_in_thread)
+            thread.start()
+            thread.join()
+            await settle(manager)
+
+        assert collector.updated == ["data://counter"]
+
+    async def test_subscribers_on_every_loop_are_notified(self, counter_server):
+        """Test that one loop publishing a change does not mute the others."""
+        server, manager, state = counter_server
+        here, there = UpdateCollector(), UpdateCollector()
+        subscribed, changed = threading.Event(), threading.Event()
+
+        async def other_loop() -> None:
+            async with Client(server, message_handler=there) as client:
+                await client.session.subscribe_resource("data://counter")
+                subscribed.set()
+                await asyncio.to_thread(changed.wait, 5.0)
+                await settle(manager)
+
+        thread = threading.Thread(target=asyncio.run, args=(other_loop(),))
+        async with Client(server, message_handler=here) as client:
+            await client.session.subscribe_resource("data://counter")
+            thread.start()
+            await asyncio.to_thread(subscribed.wait, 5.0)
+
+            state["value"] = 1
+            manager.notify_changed("data://counter")
+            changed.set()
+            await settle(manager)
+        await asyncio.to_thread(thread.join, 5.0)
+
+        assert here.updated == ["data://counter"]
+        assert there.updated == ["data://counter"]
+
+    async def test_unsubscribe_stops_notifications(self, counter_server):
+        """Test that unsubscribed sessions are not notified."""
+        server, manager, state = counter_server
+        collector = UpdateCollector()
+
+        async with Client(server, message_handler=collector) as client:
+            await client.session.subscribe_resource("data://counter")
+            await client.session.unsubscribe_resource("data://counter")
+            assert manager.subscriber_count("data://counter") == 0
+
+            state["value"] = 1
+            manager.notify_changed("data://counter")
+            await settle(manager)
+
+        assert collector.updated == []
+
+    async def test_only_subscribed_sessions_are_notified(self, counter_server):
+        """Test that notifications go only to subscribers of the URI."""
+        server, manager, state = counter_server
+        subscriber = UpdateCollector()
+        bystander = UpdateCollector()
+
+        async with (
+            Client(server, message_handler=subscriber) as first,
+            Client(server, message_handler=bystander),
+        ):
+            await first.session.subscribe_resource("data://counter")
+            state["value"] = 1
+            manager.notify_changed("data://counter")
+            await settle(manager)
+
+        assert subscriber.updated == ["data://counter"]
+        assert bystander.updated == []
+
+    async def test_unknown_resource_not_registered(self, counter_server):
+        """Test that a failed subscription leaves no subscriber behind."""
+        server, manager, _ = counter_server
+
+        async with Client(server) as client:
+            with pytest.raises(McpError, match="Unknown resource"):
+                await client.session.subscribe_resource("data://missing")
+
+        assert manager.stats()["subscribers"] == {}
+
+    async def test_notify_without_subscribers_is_noop(self):
+        """Test that reporting a change nobody watches does nothing."""
+        manager = SubscriptionManager()
+        manager.notify_changed("data://nobody")
+        assert manager.stats() == {"subscribers": {}, "notifications_sent": 0}
+
+
+@pytest.mark.asyncio
+class TestSettingsSubscription:
+    """Test subscriptions to the server's own resources."""
+
+    async def test_stats_resources_cannot_be_subscribed(self):
+        """Test that resources that never report changes refuse subscribers."""
+        async with Client(main.mcp) as client:
+            for uri in ("stats://executors", "stats://gateway", "stats://sessions"):
+                with pytest.raises(McpError, match="does not report changes"):
+                    await client.session.subscribe_resource(uri)
+
+        assert subscriptions.stats()["subscribers"] == {}
+
+    async def test_apply_config_notifies_settings_subscribers(self):
+        """Test that applying a new configuration updates config://settings."""
+        collector = UpdateCollector()
+        original = main.config
+
+        try:
+            async with Client(main.mcp, message_handler=collector) as client:
+                await client.session.subscribe_resource("config://settings")
+
+                unchanged = ServerConfig()
+                main.apply_config(unchanged)
+                await settle(subscriptions)
+                assert collector.updated == []
+
+                changed = ServerConfig()
+                changed.timeout = 90
+                main.apply_config(changed)
+                await settle(subscriptions)
+
+                settings = await client.read_resource("config://settings")
+        finally:
+            main.apply_config(original)
+
+        assert collector.updated == ["config://settings"]
+        assert '"timeout":90' in settings[0].text.replace(" ", "")
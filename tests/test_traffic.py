@@ -0,0 +1,345 @@
+"""Test cases for traffic capture, replay and cache warm-up."""
+
+import gzip
+import json
+import queue
+import threading
+
+import pytest
+from fastmcp import Client, FastMCP
+
+from mcp_server.calculator import (
+    CACHE_SIZE,
+    cache_stats,
+    configure_caches,
+    evaluate,
+    execute,
+)
+from mcp_server.server import ServerConfig
+from mcp_server.traffic import (
+    CapturedCall,
+    TrafficRecorder,
+    main,
+    read_capture,
+    replay,
+    warm_caches,
+)
+
+
+def recorder_for(path, sample_rate: float = 1.0) -> TrafficRecorder:
+    """Build a recorder capturing to ``path``."""
+    config = ServerConfig()
+    config.capture_path = str(path)
+    config.capture_sample_rate = sample_rate
+    return TrafficRecorder(config)
+
+
+def write_capture(path, calls: list[dict]) -> None:
+    """Write captured calls as JSON lines."""
+    path.write_text("".join(json.dumps(call) + "\n" for call in calls))
+
+
+@pytest.fixture
+def small_caches():
+    """Give each test empty, small calculator caches."""
+    configure_caches(4)
+    yield
+    configure_caches(CACHE_SIZE)
+
+
+class TestTrafficRecorder:
+    """Test cases for TrafficRecorder."""
+
+    def test_disabled_without_path(self):
+        """Test that nothing is captured unless a path is configured."""
+        recorder = TrafficRecorder()
+
+        recorder.record("greet", {"name": "Alice"}, "s1")
+
+        assert not recorder.enabled
+        assert recorder.stats()["recorded"] == 0
+
+    def test_records_anonymized_calls(self, tmp_path):
+        """Test that only the expression is written verbatim."""
+        path = tmp_path / "capture.jsonl"
+        recorder = recorder_for(path)
+
+        recorder.record("calculate", {"expression": "2 + 2"}, "session-1")
+        recorder.record("greet", {"name": "Alice"}, "session-1")
+        recorder.record("greet", {"name": "Alice"}, "session-2")
+        recorder.close()
+
+        first, second, third = read_capture(path)
+        assert first.tool == "calculate"
+        assert first.args == {"expression": "2 + 2"}
+        assert first.ts > 0
+        assert second.args["name"] != "Alice"
+        assert len(second.args["name"]) == len("Alice")
+        assert second.args == third.args
+        assert first.session == second.session
+        assert second.session != third.session
+        assert "session-1" not in path.read_text()
+
+    def test_expression_variable_names_pseudonymized(self, tmp_path):
+        """Test that names in expressions are hidden but stay consistent."""
+        path = tmp_path / "capture.jsonl"
+        recorder = recorder_for(path)
+
+        recorder.record("calculate", {"expression": "bob_salary = 1e5 * 2"}, "s")
+        recorder.record("calculate", {"expression": "bob_salary / 12"}, "s")
+        recorder.record("calculate", {"expression": "x + y2"}, "s")
+        recorder.record("calculate", {"expression": "call me 555-0100!"}, "s")
+        recorder.close()
+
+        first, second, third, fourth = (
+            c.args["expression"] for c in read_capture(path)
+        )
+        assert "bob_salary" not in path.read_text()
+        assert first.endswith(" = 1e5 * 2")
+        assert second == first.split(" = ")[0] + " / 12"
+        assert execute(first, {})[1] == 200000.0
+        name_x, name_y = third.split(" + ")
+        assert name_x != name_y
+        assert execute(third, {name_x: 1, name_y: 2}) == (None, 3)
+        assert "555" not in fourth
+
+    def test_full_queue_drops_records(self):
+        """Test that a writer falling behind drops records instead of blocking."""
+        recorder = TrafficRecorder()
+        recorder._queue = queue.Queue(maxsize=1)
+        recorder._writer = threading.Thread(target=lambda: None)
+
+        recorder.record("calculate", {"expression": "1"}, "s")
+        recorder.record("calculate", {"expression": "2"}, "s")
+
+        assert recorder.stats()["dropped"] == 1
+
+    def test_nested_arguments_anonymized(self, tmp_path):
+        """Test that strings inside lists and objects are anonymized too."""
+        path = tmp_path / "capture.jsonl"
+        recorder = recorder_for(path)
+
+        recorder.record("lookup", {"q": {"names": ["Bob"], "limit": 3}}, None)
+        recorder.close()
+
+        (call,) = read_capture(path)
+        assert call.args["q"]["limit"] == 3
+        assert call.args["q"]["names"][0] != "Bob"
+        assert call.session is None
+
+    def test_sampling_keeps_whole_sessions(self, tmp_path):
+        """Test that a session is either captured completely or not at all."""
+        path = tmp_path / "capture.jsonl"
+        recorder = recorder_for(path, sample_rate=0.5)
+
+        for session in range(200):
+            for step in range(3):
+                recorder.record("calculate", {"expression": str(step)}, str(session))
+        recorder.close()
+
+        per_session: dict[str, int] = {}
+        for call in read_capture(path):
+            per_session[call.session] = per_session.get(call.session, 0) + 1
+        assert set(per_session.values()) == {3}
+        assert 50 < len(per_session) < 150
+
+    def test_gzip_capture(self, tmp_path):
+        """Test that a .gz path is written compressed and read back."""
+        path = tmp_path / "capture.jsonl.gz"
+        recorder = recorder_for(path)
+
+        recorder.record("calculate", {"expression": "1 + 1"}, "s")
+        recorder.close()
+
+        with gzip.open(path, "rt") as capture:
+            assert "1 + 1" in capture.read()
+        assert [c.args for c in read_capture(path)] == [{"expression": "1 + 1"}]
+
+    async def test_captures_calls_through_middleware(self, tmp_path):
+        """Test that tool calls made to an attached server are captured."""
+        path = tmp_path / "capture.jsonl"
+        recorder = recorder_for(path)
+        server = FastMCP("test")
+
+        @server.tool
+        def echo(text: str) -> str:
+            return text
+
+        recorder.attach(server)
+        async with Client(server) as client:
+            await client.call_tool("echo", {"text": "secret"})
+        recorder.close()
+
+        (call,) = read_capture(path)
+        assert call.tool == "echo"
+        assert call.session is not None
+        assert call.args["text"] != "secret"
+
+
+class TestReadCapture:
+    """Test cases for read_capture."""
+
+    def test_skips_unreadable_lines(self, tmp_path):
+        """Test that a line cut short by a crash does not stop reading."""
+        path = tmp_path / "capture.jsonl"
+        path.write_text(
+            '{"ts": 1.0, "tool": "calculate", "args": {"expression": "1"}}\n'
+            "\n"
+            '{"ts": 2.0, "tool": "calc'
+        )
+
+        assert [call.ts for call in read_capture(path)] == [1.0]
+
+    def test_corrupt_gzip_ends_reading(self, tmp_path):
+        """Test that a damaged compressed file yields what is readable."""
+        path = tmp_path / "capture.jsonl.gz"
+        line = '{"ts": 1.0, "tool": "calculate", "args": {"expression": "1"}}\n'
+        data = gzip.compress(line.encode() * 1000)
+        path.write_bytes(data[: len(data) // 2] + b"garbage" * 20)
+
+        assert all(call.ts == 1.0 for call in read_capture(path))
+        path.write_bytes(b"not gzip at all")
+        assert list(read_capture(path)) == []
+
+    def test_invalid_utf8_line_skipped(self, tmp_path):
+        """Test that a line that is not UTF-8 is skipped."""
+        path = tmp_path / "capture.jsonl"
+        path.write_bytes(
+            b'{"ts": 1.0, "tool": "\xff\xfe", "args": {}}\n'
+            b'{"ts": 2.0, "tool": "calculate", "args": {"expression": "1"}}\n'
+        )
+
+        assert [call.ts for call in read_capture(path)] == [2.0]
+
+
+class TestWarmCaches:
+    """Test cases for warm_caches."""
+
+    def test_most_frequent_expressions_warmed(self, tmp_path, small_caches):
+        """Test that the most frequent variable-free expressions are cached."""
+        path = tmp_path / "capture.jsonl"
+        expressions = ["1 + 1"] * 5 + ["2 * 3"] * 4 + ["x = 7"] * 3
+        expressions += [f"{i} + 0" for i in range(10)]
+        write_capture(
+            path,
+            [
+                {"ts": i, "tool": "calculate", "args": {"expression": e}}
+                for i, e in enumerate(expressions)
+            ]
+            + [{"ts": 99, "tool": "greet", "args": {"name": "abcde"}}],
+        )
+
+        warmed = warm_caches(path, limit=3)
+
+        assert warmed == 3
+        before = cache_stats()
+        evaluate("1 + 1")
+        evaluate("2 * 3")
+        execute("x = 7", {})
+        after = cache_stats()
+        assert after["results"]["hits"] - before["results"]["hits"] == 2
+        assert before["statements"]["currsize"] == 0
+
+    def test_invalid_expressions_not_counted(self, tmp_path, small_caches):
+        """Test that expressions that fail are skipped."""
+        path = tmp_path / "capture.jsonl"
+        write_capture(
+            path,
+            [
+                {"ts": 0, "tool": "calculate", "args": {"expression": "1 / 0"}},
+                {"ts": 1, "tool": "calculate", "args": {"expression": "9**9**9"}},
+                {"ts": 2, "tool": "calculate", "args": {"expression": "3 - 1"}},
+            ],
+        )
+
+        assert warm_caches(path) == 1
+
+
+@pytest.mark.asyncio
+class TestReplay:
+    """Test cases for replay."""
+
+    async def test_replays_sessions_in_order(self):
+        """Test that a session's variables carry over during replay."""
+        calls = [
+            CapturedCall(
+                ts=0.0, session="a", tool="calculate", args={"expression": "x = 3 * 7"}
+            ),
+            CapturedCall(
+                ts=0.0, session="b", tool="calculate", args={"expression": "x = 1"}
+            ),
+            CapturedCall(
+                ts=0.0, session="a", tool="calculate", args={"expression": "x / 2"}
+            ),
+            CapturedCall(ts=0.0, session="b", tool="greet", args={"name": "abc"}),
+        ]
+
+        report = await replay(calls, speed=0)
+
+        assert report.calls == 4
+        assert report.errors == 0
+        assert report.max_ms >= report.p50_ms > 0
+
+    async def test_errors_are_counted(self):
+        """Test that failing calls are reported as errors."""
+        calls = [
+            CapturedCall(
+                ts=0.0, session="a", tool="calculate", args={"expression": "y"}
+            ),
+            CapturedCall(ts=0.0, session="a", tool="missing", args={}),
+        ]
+
+        report = await replay(calls, speed=0)
+
+        assert report.errors == 1
+
+    async def test_unreachable_target_counts_errors(self):
+        """Test that failing to connect is reported instead of aborting."""
+        calls = [
+            CapturedCall(ts=0.0, session=s, tool="calculate", args={"expression": "1"})
+            for s in ("a", "a", "b")
+        ]
+
+        report = await replay(calls, "http://127.0.0.1:9/mcp", speed=0)
+
+        assert report.calls == 3
+        assert report.errors == 3
+
+    async def test_speed_scales_timing(self):
+        """Test that replay keeps the captured pacing, scaled by speed."""
+        calls = [
+            CapturedCall(ts=100.0 + t, tool="calculate", args={"expression": "1"})
+            for t in (0.0, 0.2, 0.4)
+        ]
+
+        report = await replay(calls, speed=2.0)
+
+        assert 0.2 <= report.duration < 0.4
+
+
+class TestMain:
+    """Test cases for the command line entry point."""
+
+    def test_replay_command(self, tmp_path, capsys):
+        """Test replaying a capture file from the command line."""
+        path = tmp_path / "capture.jsonl"
+        write_capture(
+            path,
+            [
+                {
+                    "ts": 0,
+                    "session": "s",
+                    "tool": "calculate",
+                    "args": {"expression": "x = 2"},
+                },
+                {
+                    "ts": 0,
+                    "session": "s",
+                    "tool": "calculate",
+                    "args": {"expression": "x * 3"},
+                },
+            ],
+        )
+
+        assert main(["replay", str(path), "--speed", "0"]) == 0
+        assert "2 calls in" in capsys.readouterr().out